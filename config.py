@@ -1,4 +1,7 @@
 # CHANGELOG
+# - v0.6 (2026-10-16): Add SMS_MAX_CONCURRENT_SENDS for parallel SMS sending.
+# - v0.5 (2026-10-16): Add EMAIL_RATE_LIMIT_BURST for the shared Brevo token bucket.
+# - v0.4 (2026-10-16): Add EMAIL_MAX_CONCURRENT_CHUNKS for parallel chunk sending.
 # - v0.3 (2025-11-05): Add email sending configuration parameters for reliability improvements.
 # - v0.2 (2025-09-01): Add AI_MESSENGER_MODE env gate ("email" default; "sms" enables SMS-only UI).
 # - v0.1: Consolidated secrets access and log path.
@@ -58,6 +61,7 @@ EMAIL_MAX_RETRY_DELAY = _safe_float(APP_CREDENTIALS.get("EMAIL_MAX_RETRY_DELAY")
 
 # Rate limiting configuration
 EMAIL_RATE_LIMIT_DELAY = _safe_float(APP_CREDENTIALS.get("EMAIL_RATE_LIMIT_DELAY"), 0.1)  # seconds between API calls
+EMAIL_RATE_LIMIT_BURST = _safe_int(APP_CREDENTIALS.get("EMAIL_RATE_LIMIT_BURST"), 20)  # API calls allowed back-to-back
 EMAIL_CHUNK_DELAY = _safe_float(APP_CREDENTIALS.get("EMAIL_CHUNK_DELAY"), 1.0)  # seconds between chunks
 
 # Batch size configuration
@@ -66,5 +70,13 @@ EMAIL_CHUNK_DELAY = _safe_float(APP_CREDENTIALS.get("EMAIL_CHUNK_DELAY"), 1.0)
 # Higher values = faster, but one error affects more emails
 EMAIL_DEFAULT_CHUNK_SIZE = _safe_int(APP_CREDENTIALS.get("EMAIL_DEFAULT_CHUNK_SIZE"), 500)
 
+# Concurrency configuration
+# Number of chunks sent to Brevo in parallel (chunk starts are still spaced by EMAIL_CHUNK_DELAY)
+EMAIL_MAX_CONCURRENT_CHUNKS = _safe_int(APP_CREDENTIALS.get("EMAIL_MAX_CONCURRENT_CHUNKS"), 4)
+
 # Attachment configuration
 EMAIL_MAX_ATTACHMENT_SIZE_MB = _safe_int(APP_CREDENTIALS.get("EMAIL_MAX_ATTACHMENT_SIZE_MB"), 10)  # MB per attachment
+
+# === SMS SENDING CONFIGURATION ===
+# Max multi-recipient gateway messages in flight at once (each carries up to MAX_RECIPIENTS_PER_MESSAGE recipients, see sms_tool)
+SMS_MAX_CONCURRENT_SENDS = _safe_int(APP_CREDENTIALS.get("SMS_MAX_CONCURRENT_SENDS"), 32)
@@ -1,14 +1,96 @@
 # data_handler_phone_numbers.py
 import pandas as pd
 import re # Import regex for more robust phone number pattern checking
+from functools import lru_cache
+
+# Phone number pattern used for both column detection and validation, compiled once:
+# allows for +, digits, spaces, hyphens, parentheses, 7-20 chars
+# (e.g., 123-456-7890, (123) 456-7890, 1234567890, +33 6 12 34 56 78)
+_PHONE_RE = re.compile(r'^\+?[\d\s\-\(\)]{7,20}$')
+
+# Rust-backed calamine reader (pandas >= 2.2 with python-calamine) parses workbooks several times
+# faster and with far less memory than openpyxl; fall back to pandas' default engine without it
+try:
+    import python_calamine  # noqa: F401
+    EXCEL_ENGINE = "calamine"
+except ImportError:
+    EXCEL_ENGINE = None
+
+def _rewind(file_path):
+    """Seeks file-like sources back to the start so they can be read again (paths need nothing)."""
+    if hasattr(file_path, "seek"):
+        file_path.seek(0)
+
+def _read_excel(file_path, **kwargs):
+    """pd.read_excel() using EXCEL_ENGINE, retried with pandas' default engine (openpyxl/xlrd) if calamine fails."""
+    if EXCEL_ENGINE:
+        try:
+            return pd.read_excel(file_path, engine=EXCEL_ENGINE, **kwargs)
+        except Exception:
+            _rewind(file_path)
+    return pd.read_excel(file_path, **kwargs)
+
+# Header names recognized directly (after strip/lower), in order of preference
+# Phone: exact 'phone' or common spellings; name: common spellings in English and French
+PHONE_COLUMN_CANDIDATES = ('phone', 'mobile', 'tel', 'telephone', 'phone number', 'contact number', 'cell')
+NAME_COLUMN_CANDIDATES = ('name', 'full name', 'first name', 'last name', 'nom', 'prenom', 'contact', 'contacts')
+
+@lru_cache(maxsize=128)
+def _find_first_matching_column(columns, candidates, exclude=None):
+    """
+    Returns the most preferred of candidates present in columns (other than exclude), or None.
+
+    One pass over columns with a rank lookup per header; memoized per (columns, candidates, exclude),
+    since the same header row is resolved for both the phone and the name column.
+    """
+    rank = {candidate: i for i, candidate in enumerate(candidates)}
+    best, best_rank = None, len(candidates)
+    for col in columns:
+        col_rank = rank.get(col, best_rank)
+        if col_rank < best_rank and col != exclude:
+            best, best_rank = col, col_rank
+    return best
+
+def _normalize_phones(series):
+    """
+    Vectorized phone normalization and validation for one column.
+
+    Returns (phone_numbers, valid): the values as stripped strings ('' if missing), and a boolean
+    mask of those matching _PHONE_RE. This basic check catches most obvious invalid formats.
+
+    Runs on object dtype on purpose: Arrow-backed strings (pandas' default string dtype when pyarrow
+    is installed) evaluate the regex with RE2, whose \\d and \\s are ASCII-only, and would reject
+    numbers written with non-breaking spaces that Python's re accepts.
+    """
+    phone_numbers = series.astype(object).fillna('').str.strip()
+    return phone_numbers, phone_numbers.str.match(_PHONE_RE, na=False).astype(bool)
+
+def _columns_to_load(headers):
+    """
+    Returns the original headers of the phone and name columns, when the phone column can be
+    recognized by its header alone; None (load every column) when it needs content-based detection.
+    """
+    normalized = [col.strip().lower() for col in headers]
+    columns = tuple(normalized)
+    phone_col = _find_first_matching_column(columns, PHONE_COLUMN_CANDIDATES)
+    if not phone_col:
+        return None
+    name_col = _find_first_matching_column(columns, NAME_COLUMN_CANDIDATES, phone_col) \
+        or next((col for col in columns if col != phone_col), None)
+    return [header for header, col in zip(headers, normalized) if col in (phone_col, name_col)]
 
 def load_contacts_from_excel(file_path):
     """
     Loads contacts from an Excel file, dynamically identifies 'phone_number' and 'name' columns,
     and returns a list of dictionaries with 'name' and 'phone_number' keys.
     """
+    # Read all columns as strings to preserve leading zeros and '+' (and skip pandas' type inference).
+    # This is a more robust approach for mixed data types in Excel, especially for phone numbers.
+    # The header row is read first, so that wide sheets only load the phone and name columns.
     try:
-        df = pd.read_excel(file_path)
+        headers = list(_read_excel(file_path, nrows=0).columns)
+        _rewind(file_path)
+        df = _read_excel(file_path, dtype=str, usecols=_columns_to_load(headers))
     except Exception as e:
         # Catch errors if the file is not a valid Excel or unreadable
         return [], [f"Error reading Excel file: {e}. Please ensure it's a valid .xlsx or .xls file."]
@@ -17,28 +99,11 @@ def load_contacts_from_excel(file_path):
     # Also strip any leading/trailing whitespace from column names
     df.columns = [col.strip().lower() for col in df.columns]
 
-    phone_number_col_name = None
-    name_col_name = None
-
-    # Attempt to read all columns as strings initially to preserve leading zeros and '+'
-    # This is a more robust approach for mixed data types in Excel, especially for phone numbers.
-    # If this causes issues with other numeric columns, we might need a more targeted approach
-    # after column detection.
-    try:
-        df = pd.read_excel(file_path, dtype=str)
-    except Exception as e:
-        return [], [f"Error reading Excel file with string dtype: {e}. Please ensure it's a valid .xlsx or .xls file."]
-
-    # Re-standardize column names after re-reading with dtype=str
-    df.columns = [col.strip().lower() for col in df.columns]
+    columns = tuple(df.columns)
 
     # --- Strategy for Phone Number Column Detection ---
     # Prioritize exact 'phone' or common spellings first
-    common_phone_number_names = ['phone', 'mobile', 'tel', 'telephone', 'phone number', 'contact number', 'cell']
-    for common_name in common_phone_number_names:
-        if common_name in df.columns:
-            phone_number_col_name = common_name
-            break # Found a direct match, use it
+    phone_number_col_name = _find_first_matching_column(columns, PHONE_COLUMN_CANDIDATES)
 
     # If not found by common names, try to detect based on content (presence of digits and common phone number patterns)
     if not phone_number_col_name:
@@ -46,13 +111,8 @@ def load_contacts_from_excel(file_path):
             # Convert column to string type to handle mixed types gracefully
             col_series = df[col].astype(str).dropna() # Drop NaN/empty strings for accurate percentage
 
-            # Define a more robust phone number pattern for content-based detection
-            # This regex checks for common phone number formats (e.g., 123-456-7890, (123) 456-7890, 1234567890)
-            # It's a flexible pattern to catch various international and local formats
-            phone_pattern = r'^\+?[\d\s\-\(\)]{7,20}$' # Allows for +, digits, spaces, hyphens, parentheses, 7-20 chars
-            
-            # Count how many non-empty cells contain a phone number-like pattern
-            phone_like_count = col_series.str.contains(phone_pattern, regex=True, na=False).sum()
+            # Count how many non-empty cells contain a phone number-like pattern (_PHONE_RE)
+            phone_like_count = col_series.str.contains(_PHONE_RE, na=False).sum()
             
             # Consider a column a phone number column if a significant percentage (e.g., > 50%) of its values look like phone numbers
             if len(col_series) > 0 and (phone_like_count / len(col_series)) >= 0.5: # 50% threshold for confidence
@@ -66,12 +126,8 @@ def load_contacts_from_excel(file_path):
 
     # --- Strategy for Name Column Detection ---
     # Prioritize common 'name' spellings in English and French
-    common_name_columns = ['name', 'full name', 'first name', 'last name', 'nom', 'prenom', 'contact', 'contacts']
-    for common_name in common_name_columns:
-        if common_name in df.columns and common_name != phone_number_col_name:
-            name_col_name = common_name
-            break # Found a direct match, use it
-            
+    name_col_name = _find_first_matching_column(columns, NAME_COLUMN_CANDIDATES, phone_number_col_name)
+
     # If no common name column, pick the first non-phone number column available
     if not name_col_name:
         for col in df.columns:
@@ -82,25 +138,26 @@ def load_contacts_from_excel(file_path):
     # If still no name column found (e.g., only phone number column exists), we will use a fallback name below
     
     # --- Process Contacts ---
-    contacts = []
-    contact_issues = []
-
-    for index, row in df.iterrows():
-        # Get phone number using the identified column, defaulting to empty string if not found or NaN
-        phone_number = str(row[phone_number_col_name]).strip() if pd.notna(row[phone_number_col_name]) else ''
-        
-        # Get name using the identified column, defaulting to "Contact X" if not found or NaN
-        if name_col_name and pd.notna(row.get(name_col_name)):
-            name = str(row[name_col_name]).strip()
-        else:
-            name = f"Contact {index + 1}" # Fallback if no name column or name is missing
-
-        # Basic phone number validation: must not be empty and match basic regex pattern
-        # This will catch most obvious invalid formats
-        if phone_number and re.match(r'^\+?[\d\s\-\(\)]{7,20}$', phone_number):
-            contacts.append({"name": name, "phone_number": phone_number})
-        else:
-            # Log issues including the name detected, even if it's a fallback "Contact X"
-            contact_issues.append(f"Row {index + 2}: Invalid or missing phone number for '{name}' (Phone: '{phone_number}').") # +2 for header row and 0-indexing
+    # Column-wise (vectorized) rather than row by row with iterrows()
+
+    # Phone numbers as stripped strings (empty string if missing) and which of them are valid
+    phone_numbers, valid = _normalize_phones(df[phone_number_col_name])
+
+    # Names from the identified column, defaulting to "Contact X" if not found or NaN
+    fallback_names = pd.Series(range(1, len(df) + 1), index=df.index).astype(str).radd("Contact ")
+    if name_col_name:
+        names = df[name_col_name]
+        names = names.astype(object).str.strip().where(names.notna(), fallback_names)
+    else:
+        names = fallback_names
+
+    contacts = pd.DataFrame({"name": names[valid], "phone_number": phone_numbers[valid]}).to_dict("records")
+
+    # Log issues including the name detected, even if it's a fallback "Contact X"
+    invalid = ~valid
+    contact_issues = [
+        f"Row {index + 2}: Invalid or missing phone number for '{name}' (Phone: '{phone_number}')." # +2 for header row and 0-indexing
+        for index, name, phone_number in zip(df.index[invalid], names[invalid], phone_numbers[invalid])
+    ]
 
     return contacts, contact_issues
@@ -9,6 +9,8 @@ from datetime import datetime, timedelta, timezone
 import logging
 import os
 import re
+from functools import lru_cache
+from typing import Dict, Tuple
 from brevo_python.rest import ApiException
 
 from brevo_status_client import BrevoStatusClient
@@ -17,6 +19,65 @@ from config import BREVO_API_KEY
 
 logger = logging.getLogger(__name__)
 
+# "Possible Solutions" bullet lists for the error debug panels (one markdown call each)
+_SOLUTIONS_RATE_LIMIT = "\n".join([
+    "- Wait 1-2 minutes before retrying",
+    "- Reduce the frequency of requests",
+    "- Contact Brevo support to increase your rate limit",
+])
+_SOLUTIONS_API_KEY = "\n".join([
+    "- Verify your API key in Brevo dashboard",
+    "- Ensure the API key has 'Email Campaigns' permissions",
+    "- Check if the API key is correctly configured in secrets/config",
+])
+_SOLUTIONS_GENERIC = "\n".join([
+    "- Check your internet connection",
+    "- Try refreshing the page",
+    "- Contact support if the issue persists",
+])
+
+# Splits a display link at the first "/" or "." to get the leading domain label
+_SHORT_NAME_SPLIT_RE = re.compile(r"[/.]")
+
+# Table column keys (translated at render time); activity keys are in row tuple order
+ACTIVITY_COLUMNS = (
+    "Recipient",
+    "Delivery Status",
+    "Delivered",
+    "Read",
+    "Clicked",
+    "Clicked Links",
+    "Timestamp",
+)
+ACTIVITY_DEBUG_COLUMNS = ACTIVITY_COLUMNS + (
+    "Last Event",
+    "Delivered Count",
+    "Opened Count",
+    "Clicks Count",
+    "Hard Bounces",
+    "Soft Bounces",
+    "Blocked",
+    "Deferred",
+    "Bounce Reason",
+    "Status Priority",
+)
+EXPORT_COLUMNS = (
+    "Message ID",
+    "Email",
+    "Subject",
+    "Tag",
+    "Delivered Count",
+    "Opened Count",
+    "Clicked Count",
+    "Hard Bounce",
+    "Soft Bounce",
+    "Blocked",
+    "Spam",
+    "Last Event",
+    "Last Event Date",
+)
+ALL_COLUMNS = tuple(dict.fromkeys(ACTIVITY_DEBUG_COLUMNS + EXPORT_COLUMNS))
+
 def extract_message_batch(message_id: str) -> str:
     """
     Extract batch identifier from Brevo message_id.
@@ -59,6 +120,103 @@ def is_soft_bounce_actually_invalid(bounce_reason: str) -> bool:
     
     return any(pattern in reason_lower for pattern in invalid_patterns)
 
+@lru_cache(maxsize=4096)
+def _identify_link_type(link: str) -> Tuple[str, str]:
+    """
+    Identify the type of a clicked link and return (display_name, link_type).
+    Cached because the same tracked URLs are clicked by many recipients.
+    """
+    link_lower = link.lower()
+    
+    # Check for unsubscribe patterns
+    if ("unsubscribe" in link_lower or 
+        "désabonnement" in link_lower or
+        "desinscription" in link_lower or
+        # Google Forms often used for unsubscribe
+        ("docs.google.com/forms" in link_lower) or
+        ("forms.gle" in link_lower)):
+        return ("🔕 Unsubscribe", "unsubscribe")
+    
+    # Check for donate patterns
+    elif ("donate" in link_lower or 
+          "donation" in link_lower or
+          "don" in link_lower or
+          "dons" in link_lower or
+          "paiement" in link_lower or
+          "stripe" in link_lower):
+        return ("💝 Donate", "donate")
+    
+    # Other links - show shortened URL
+    else:
+        display_link = link.replace("https://", "").replace("http://", "").replace("www.", "")
+        if len(display_link) > 30:
+            display_link = display_link[:27] + "..."
+        return (display_link, "other")
+
+def _get_column_labels() -> Dict[str, str]:
+    """
+    Return translated table column labels, cached in session state per language
+    so they are translated once per session instead of on every rerun.
+    """
+    cache_key = f"_status_col_labels_{st.session_state.get('language', 'en')}"
+    if cache_key not in st.session_state:
+        st.session_state[cache_key] = {key: _t(key) for key in ALL_COLUMNS}
+    return st.session_state[cache_key]
+
+def _to_arrow_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert DataFrame columns to pyarrow-backed dtypes so st.dataframe can
+    serialize them without walking every object cell in Python.
+    Falls back to the original DataFrame if pyarrow (or pandas >= 2.0) is unavailable.
+    """
+    try:
+        return df.convert_dtypes(dtype_backend="pyarrow")
+    except (ImportError, TypeError, ValueError) as e:
+        logger.debug(f"pyarrow dtype conversion unavailable, using object dtypes: {e}")
+        return df
+
+@lru_cache(maxsize=4096)
+def _short_link_name(display_name: str) -> str:
+    """Return the first label of a shortened link's domain for compact multi-link display."""
+    short_name = _SHORT_NAME_SPLIT_RE.split(display_name, maxsplit=1)[0]
+    if len(short_name) > 10:
+        short_name = short_name[:8] + ".."
+    return short_name
+
+def _build_activity_row(r, delivery_status, status_priority, clicked_links_display, timestamp_str,
+                        is_delivered, has_opened, has_clicked):
+    """Build an activity table row as a tuple matching ACTIVITY_COLUMNS."""
+    # Rule: Can only show Read/Clicked if delivered
+    # Note: Clicked can happen without Read (images blocked)
+    return (
+        r["email"],
+        delivery_status,
+        "✓" if is_delivered else "—",
+        "✓" if (has_opened and is_delivered) else "—",
+        "✓" if (has_clicked and is_delivered) else "—",
+        clicked_links_display if clicked_links_display else "—",
+        timestamp_str,
+    )
+
+def _build_activity_row_debug(r, delivery_status, status_priority, clicked_links_display, timestamp_str,
+                              is_delivered, has_opened, has_clicked):
+    """Build an activity table row as a tuple matching ACTIVITY_DEBUG_COLUMNS."""
+    return _build_activity_row(
+        r, delivery_status, status_priority, clicked_links_display, timestamp_str,
+        is_delivered, has_opened, has_clicked
+    ) + (
+        r["last_event"],
+        r["delivered"],
+        r["opened"],
+        r["clicks"],
+        r["hardBounces"],
+        r["softBounces"],
+        r["blocked"],
+        r["deferred"],
+        r.get("bounce_reason", ""),  # Show Brevo's bounce reason
+        status_priority,
+    )
+
 def main():
     # IMPORTANT: Do NOT call st.set_page_config here (already set in parent streamlit_app.py)
 
@@ -79,6 +237,7 @@ def main():
     # Apply language from main app if available
     if "language" in st.session_state:
         set_language(st.session_state.language)
+    col_labels = _get_column_labels()
 
     # Modern SaaS Dashboard CSS
     st.markdown(
@@ -696,7 +855,7 @@ def main():
                         "last_event_date": "",
                         "send_date": "",  # Track earliest send date for sorting
                         "bounce_reason": "",  # Track bounce reason for debugging
-                        "click_links": [],
+                        "click_links": {},  # Ordered set of clicked URLs (dict keys)
                     }
 
                 # Normalize event type to canonical form
@@ -746,9 +905,9 @@ def main():
                     if not email_data[msg_id]["send_date"] or (current_date and current_date < email_data[msg_id]["send_date"]):
                         email_data[msg_id]["send_date"] = current_date
 
-                # Track clicked links
+                # Track clicked links (deduplicated once here rather than per table render)
                 if event_type == "clicks" and event.get("link"):
-                    email_data[msg_id]["click_links"].append(event["link"])
+                    email_data[msg_id]["click_links"][event["link"]] = None
                 
                 # Track bounce reason for hard and soft bounces
                 if event_type in ('hardBounces', 'softBounces', 'blocked') and event.get("reason"):
@@ -1194,8 +1353,18 @@ def main():
                         # First, check if we should show debug info (will be set by checkbox below table)
                         show_debug = st.session_state.get(f"debug_{group_key}", False)
                         
+                        activity_columns = [
+                            col_labels[key] for key in (ACTIVITY_DEBUG_COLUMNS if show_debug else ACTIVITY_COLUMNS)
+                        ]
+                        # Choose the row builder once instead of checking show_debug per row
+                        build_row = _build_activity_row_debug if show_debug else _build_activity_row
                         activity_rows = []
                         for r in group["recipients"]:
+                            # Evaluate each count check once per row
+                            is_delivered = r["delivered"] > 0
+                            has_opened = r["opened"] > 0
+                            has_clicked = r["clicks"] > 0
+                            
                             # Determine delivery status with improved logic
                             # Priority: Invalid > Failed > Delivered (with engagement) > Delayed > Pending
                             
@@ -1211,11 +1380,8 @@ def main():
                                 delivery_status = _t("❌ Failed")
                                 status_priority = 2
                             # Check for successful delivery
-                            elif r["delivered"] > 0:
+                            elif is_delivered:
                                 # Determine engagement level
-                                has_opened = r["opened"] > 0
-                                has_clicked = r["clicks"] > 0
-                                
                                 if has_clicked and has_opened:
                                     delivery_status = _t("🎯 Engaged (Opened & Clicked)")
                                     status_priority = 3
@@ -1249,55 +1415,20 @@ def main():
                                 except Exception:
                                     pass
                             
-                            # Build row data with validated checkmarks
-                            # Rule: Can only show Read/Clicked if delivered
-                            # Note: Clicked can happen without Read (images blocked)
-                            is_delivered = r["delivered"] > 0
-                            
                             # Format clicked links for display
                             clicked_links_display = ""
                             if r["click_links"]:
-                                # Helper function to identify link type
-                                def identify_link_type(link):
-                                    """Identify the type of link and return a display name"""
-                                    link_lower = link.lower()
-                                    
-                                    # Check for unsubscribe patterns
-                                    if ("unsubscribe" in link_lower or 
-                                        "désabonnement" in link_lower or
-                                        "desinscription" in link_lower or
-                                        # Google Forms often used for unsubscribe
-                                        ("docs.google.com/forms" in link_lower) or
-                                        ("forms.gle" in link_lower)):
-                                        return ("🔕 Unsubscribe", "unsubscribe")
-                                    
-                                    # Check for donate patterns
-                                    elif ("donate" in link_lower or 
-                                          "donation" in link_lower or
-                                          "don" in link_lower or
-                                          "dons" in link_lower or
-                                          "paiement" in link_lower or
-                                          "stripe" in link_lower):
-                                        return ("💝 Donate", "donate")
-                                    
-                                    # Other links - show shortened URL
-                                    else:
-                                        display_link = link.replace("https://", "").replace("http://", "").replace("www.", "")
-                                        if len(display_link) > 30:
-                                            display_link = display_link[:27] + "..."
-                                        return (display_link, "other")
-                                
                                 # Show unique links that were clicked
-                                unique_links = list(set(r["click_links"]))
+                                unique_links = list(r["click_links"])
                                 if len(unique_links) == 1:
                                     link = unique_links[0]
-                                    display_name, link_type = identify_link_type(link)
+                                    display_name, link_type = _identify_link_type(link)
                                     clicked_links_display = display_name
                                 else:
                                     # Multiple links clicked - show each link type clearly
                                     link_displays = []
                                     for link in unique_links:
-                                        display_name, link_type = identify_link_type(link)
+                                        display_name, link_type = _identify_link_type(link)
                                         # For multiple links, use very compact format
                                         if link_type == "unsubscribe":
                                             link_displays.append("🔕")
@@ -1305,38 +1436,16 @@ def main():
                                             link_displays.append("💝")
                                         else:
                                             # For other links, just show first part of domain
-                                            short_name = display_name.split("/")[0].split(".")[0]
-                                            if len(short_name) > 10:
-                                                short_name = short_name[:8] + ".."
-                                            link_displays.append(short_name)
+                                            link_displays.append(_short_link_name(display_name))
                                     
                                     # Join with spaces for compact display
                                     clicked_links_display = " ".join(link_displays)
                             
-                            row_data = {
-                                _t("Recipient"): r["email"],
-                                _t("Delivery Status"): delivery_status,
-                                _t("Delivered"): "✓" if is_delivered else "—",
-                                _t("Read"): "✓" if (r["opened"] > 0 and is_delivered) else "—",
-                                _t("Clicked"): "✓" if (r["clicks"] > 0 and is_delivered) else "—",
-                                _t("Clicked Links"): clicked_links_display if clicked_links_display else "—",
-                                _t("Timestamp"): timestamp_str
-                            }
-                            
-                            # Add debug columns if enabled
-                            if show_debug:
-                                row_data[_t("Last Event")] = r["last_event"]
-                                row_data[_t("Delivered Count")] = r["delivered"]
-                                row_data[_t("Opened Count")] = r["opened"]
-                                row_data[_t("Clicks Count")] = r["clicks"]
-                                row_data[_t("Hard Bounces")] = r["hardBounces"]
-                                row_data[_t("Soft Bounces")] = r["softBounces"]
-                                row_data[_t("Blocked")] = r["blocked"]
-                                row_data[_t("Deferred")] = r["deferred"]
-                                row_data[_t("Bounce Reason")] = r.get("bounce_reason", "")  # Show Brevo's bounce reason
-                                row_data[_t("Status Priority")] = status_priority
-                            
-                            activity_rows.append(row_data)
+                            activity_rows.append(build_row(
+                                r, delivery_status, status_priority,
+                                clicked_links_display, timestamp_str,
+                                is_delivered, has_opened, has_clicked
+                            ))
                         
                         # Display table in a container - auto-size based on number of rows
                         # Calculate appropriate height: header (38px) + rows (35px each) + padding
@@ -1345,7 +1454,7 @@ def main():
                         
                         st.markdown('<div class="activity-table-container">', unsafe_allow_html=True)
                         st.dataframe(
-                            pd.DataFrame(activity_rows),
+                            _to_arrow_dtypes(pd.DataFrame(activity_rows, columns=activity_columns)),
                             use_container_width=True,
                             hide_index=True,
                             height=table_height
@@ -1371,26 +1480,26 @@ def main():
                 st.markdown("### " + _t("Download Report"))
                 st.markdown(_t("Export the current email status data"))
 
-                export_rows = []
-                for msg_id, data in email_data.items():
-                    export_rows.append(
-                        {
-                            _t("Message ID"): msg_id,
-                            _t("Email"): data["email"],
-                            _t("Subject"): data["subject"],
-                            _t("Tag"): data["tag"],
-                            _t("Delivered Count"): data["delivered"],
-                            _t("Opened Count"): data["opened"],
-                            _t("Clicked Count"): data["clicks"],
-                            _t("Hard Bounce"): data["hardBounces"],
-                            _t("Soft Bounce"): data["softBounces"],
-                            _t("Blocked"): data["blocked"],
-                            _t("Spam"): data["spam"],
-                            _t("Last Event"): data["last_event"],
-                            _t("Last Event Date"): data["last_event_date"],
-                        }
+                # Row tuples follow EXPORT_COLUMNS order; the header comes from the constant itself
+                export_rows = [
+                    (
+                        msg_id,
+                        data["email"],
+                        data["subject"],
+                        data["tag"],
+                        data["delivered"],
+                        data["opened"],
+                        data["clicks"],
+                        data["hardBounces"],
+                        data["softBounces"],
+                        data["blocked"],
+                        data["spam"],
+                        data["last_event"],
+                        data["last_event_date"],
                     )
-                export_df = pd.DataFrame(export_rows)
+                    for msg_id, data in email_data.items()
+                ]
+                export_df = pd.DataFrame(export_rows, columns=[col_labels[key] for key in EXPORT_COLUMNS])
                 st.download_button(
                     label=_t("📥 Download as CSV"),
                     data=export_df.to_csv(index=False).encode("utf-8"),
@@ -1399,7 +1508,8 @@ def main():
                     use_container_width=True,
                 )
                 st.markdown("#### " + _t("Preview"))
-                st.dataframe(export_df.head(10), use_container_width=True, hide_index=True)
+                # Arrow dtypes only help st.dataframe serialization, so only the preview is converted
+                st.dataframe(_to_arrow_dtypes(export_df.head(10)), use_container_width=True, hide_index=True)
                 st.caption(_t("Showing first 10 rows of {total} total", total=len(export_df)))
 
             # Pagination controls
@@ -1454,17 +1564,11 @@ def main():
             # Show potential solutions
             st.markdown("**" + _t("Possible Solutions:") + "**")
             if status_code == 429:
-                st.markdown("- Wait 1-2 minutes before retrying")
-                st.markdown("- Reduce the frequency of requests")
-                st.markdown("- Contact Brevo support to increase your rate limit")
+                st.markdown(_SOLUTIONS_RATE_LIMIT)
             elif status_code in (401, 403):
-                st.markdown("- Verify your API key in Brevo dashboard")
-                st.markdown("- Ensure the API key has 'Email Campaigns' permissions")
-                st.markdown("- Check if the API key is correctly configured in secrets/config")
+                st.markdown(_SOLUTIONS_API_KEY)
             else:
-                st.markdown("- Check your internet connection")
-                st.markdown("- Try refreshing the page")
-                st.markdown("- Contact support if the issue persists")
+                st.markdown(_SOLUTIONS_GENERIC)
     
     except Exception as e:
         # Handle unexpected errors with fallback to substring matching
@@ -1495,17 +1599,11 @@ def main():
             # Show potential solutions
             st.markdown("**" + _t("Possible Solutions:") + "**")
             if "Rate limit" in error_message:
-                st.markdown("- Wait 1-2 minutes before retrying")
-                st.markdown("- Reduce the frequency of requests")
-                st.markdown("- Contact Brevo support to increase your rate limit")
+                st.markdown(_SOLUTIONS_RATE_LIMIT)
             elif "API key" in error_message:
-                st.markdown("- Verify your API key in Brevo dashboard")
-                st.markdown("- Ensure the API key has 'Email Campaigns' permissions")
-                st.markdown("- Check if the API key is correctly configured in secrets/config")
+                st.markdown(_SOLUTIONS_API_KEY)
             else:
-                st.markdown("- Check your internet connection")
-                st.markdown("- Try refreshing the page")
-                st.markdown("- Contact support if the issue persists")
+                st.markdown(_SOLUTIONS_GENERIC)
 
     # Footer
     st.markdown("---")
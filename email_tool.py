@@ -1,12 +1,27 @@
+import atexit
 import datetime
+import email.utils
 import os
 import base64
 import json
+import random
+import re
 import time
 import logging
+import mmap
+import queue
+import threading
 import warnings
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor, as_completed
 from typing import Dict, List, Optional, Tuple
-from functools import wraps
+from functools import lru_cache, wraps
+
+# orjson is optional: it parses error bodies faster; fall back to the stdlib otherwise
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 
 # Import Brevo SDK
 import brevo_python as sib_api_v3_sdk
@@ -18,8 +33,10 @@ from config import (
     EMAIL_INITIAL_RETRY_DELAY,
     EMAIL_MAX_RETRY_DELAY,
     EMAIL_RATE_LIMIT_DELAY,
+    EMAIL_RATE_LIMIT_BURST,
     EMAIL_CHUNK_DELAY,
     EMAIL_DEFAULT_CHUNK_SIZE,
+    EMAIL_MAX_CONCURRENT_CHUNKS,
     EMAIL_MAX_ATTACHMENT_SIZE_MB
 )
 
@@ -29,98 +46,292 @@ MAX_RETRIES = EMAIL_MAX_RETRIES
 INITIAL_RETRY_DELAY = EMAIL_INITIAL_RETRY_DELAY
 MAX_RETRY_DELAY = EMAIL_MAX_RETRY_DELAY
 RATE_LIMIT_DELAY = EMAIL_RATE_LIMIT_DELAY
+RATE_LIMIT_BURST = EMAIL_RATE_LIMIT_BURST
 CHUNK_DELAY = EMAIL_CHUNK_DELAY
 DEFAULT_CHUNK_SIZE = EMAIL_DEFAULT_CHUNK_SIZE
+MAX_CONCURRENT_CHUNKS = EMAIL_MAX_CONCURRENT_CHUNKS
+EVENTS_MAX_WORKERS = 8  # Concurrent event lookups in get_email_events
+EVENTS_BULK_THRESHOLD = 10  # Above this many IDs, fetch events by date range instead of per ID
+EVENTS_PAGE_LIMIT = 2500  # Events per page for date-range event reports
+EVENTS_BULK_MAX_DAYS = 30  # Only IDs sent within this many days go through the date-range report
+EVENTS_BULK_MAX_PAGES = 20  # Page cap for one date-range report; unfinished IDs fall back to per-ID lookups
 MAX_ATTACHMENT_SIZE_BYTES = EMAIL_MAX_ATTACHMENT_SIZE_MB * 1024 * 1024
+MAX_REQUEST_SIZE_BYTES = 10 * 1024 * 1024  # Brevo rejects larger request bodies with HTTP 413
+MESSAGE_VERSION_OVERHEAD_BYTES = 200  # JSON keys and punctuation per message version
 
 # Error categories for intelligent retry logic
-RETRYABLE_ERROR_CODES = {429, 500, 502, 503, 504}  # HTTP status codes worth retrying
-PERMANENT_ERROR_CODES = {400, 401, 403, 404}  # Don't retry these
+RETRYABLE_ERROR_CODES = frozenset({429, 500, 502, 503, 504})  # HTTP status codes worth retrying
+PERMANENT_ERROR_CODES = frozenset({400, 401, 403, 404})  # Don't retry these
+
+
+# Per-thread Brevo API instances, so keep-alive connections are reused across calls
+_api_local = threading.local()
+
+
+def _get_api():
+    """
+    Return this thread's cached TransactionalEmailsApi, creating it on first use.
+    Reusing the client keeps its connection pool (and TLS sessions) alive between calls.
+    """
+    api = getattr(_api_local, 'api', None)
+    if api is None:
+        configuration = sib_api_v3_sdk.Configuration()
+        configuration.api_key['api-key'] = BREVO_API_KEY
+        api = sib_api_v3_sdk.TransactionalEmailsApi(sib_api_v3_sdk.ApiClient(configuration))
+        _api_local.api = api
+    return api
+
+
+class DeadLetterLogger:
+    """
+    Dead-letter writer for failed emails.
+    
+    Appends one JSON line per failure ({ts, sender, to, subject, error, body_snippet})
+    to the failed-emails log, so failed recipients can later be re-read and re-sent.
+    Records are queued and written by a single background thread that keeps the
+    file open, so the failure path never blocks on file I/O.
+    """
+    
+    _instances: Dict[str, "DeadLetterLogger"] = {}
+    _instances_lock = threading.Lock()
+    
+    @classmethod
+    def instance(cls, log_path: str = FAILED_EMAILS_LOG_PATH) -> "DeadLetterLogger":
+        """Return the shared logger for log_path, creating it on first use."""
+        with cls._instances_lock:
+            dead_letter = cls._instances.get(log_path)
+            if dead_letter is None:
+                dead_letter = cls._instances[log_path] = cls(log_path)
+            return dead_letter
+    
+    def __init__(self, log_path: str):
+        self.log_path = log_path
+        self._file = None
+        self._failing = False  # Set after a write error until the next successful write
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="DeadLetterLogger", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+    
+    def log(self, sender_email, to_email, subject, body, error_message):
+        """Queue one failure record."""
+        self._queue.put({
+            'ts': datetime.datetime.now().isoformat(timespec='seconds'),
+            'sender': sender_email,
+            'to': to_email,
+            'subject': subject,
+            'error': error_message,
+            'body_snippet': body[:200] if body else None,
+        })
+    
+    def flush(self):
+        """Block until all queued records have been written."""
+        self._queue.join()
+    
+    def _open(self):
+        if self._file is None:
+            log_dir = os.path.dirname(self.log_path)
+            if log_dir:
+                os.makedirs(log_dir, exist_ok=True)
+            self._file = open(self.log_path, "a", encoding="utf-8")
+        return self._file
+    
+    def _discard_file(self) -> Optional[Exception]:
+        """Close the current handle (flushing what it can) so the next record reopens the file."""
+        f, self._file = self._file, None
+        if f is not None:
+            try:
+                f.close()
+            except Exception as e:
+                return e
+        return None
+    
+    def _run(self):
+        while True:
+            record = self._queue.get()
+            try:
+                f = self._open()
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                if self._queue.empty():
+                    f.flush()
+                self._failing = False
+            except Exception as e:
+                close_error = self._discard_file()
+                # Log once per failure streak, not once per queued record
+                log = logging.debug if self._failing else logging.error
+                log(
+                    "[EMAIL_TOOL] Failed to write to log file %s: %s%s", self.log_path, e,
+                    f" (closing it also failed: {close_error})" if close_error else ""
+                )
+                self._failing = True
+            finally:
+                self._queue.task_done()
 
 
 def _log_failed_email_to_file(sender_email, to_email, subject, body, error_message, log_path=FAILED_EMAILS_LOG_PATH):
-    """Logs details of a failed email attempt to a file."""
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    entry = (
-        f"Timestamp: {timestamp}\n"
-        f"Sender: {sender_email}\n"
-        f"Recipient: {to_email}\n"
-        f"Subject: {subject}\n"
-        f"Error: {error_message}\n"
-        f"Body Snippet: {body[:200] if body else 'N/A'}...\n"
-        f"{'-'*50}\n\n"
-    )
+    """Logs details of a failed email attempt to the dead-letter file."""
+    DeadLetterLogger.instance(log_path).log(sender_email, to_email, subject, body, error_message)
+
+
+def _parse_retry_after(headers) -> Optional[float]:
+    """
+    Parse a Retry-After header value (delta-seconds or HTTP-date) into seconds.
+    
+    Returns:
+        Seconds to wait, or None if the header is missing or unparseable
+    """
+    if not headers:
+        return None
+    value = headers.get('Retry-After') or headers.get('retry-after')
+    if not value:
+        return None
+    
     try:
-        os.makedirs(os.path.dirname(log_path), exist_ok=True)
-        with open(log_path, "a", encoding="utf-8") as f:
-            f.write(entry)
-    except Exception as e:
-        logging.error(f"Failed to write to log file {log_path}: {e}")
+        return max(0.0, float(value))
+    except (ValueError, TypeError):
+        pass
+    
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+        now = datetime.datetime.now(retry_at.tzinfo)
+        return max(0.0, (retry_at - now).total_seconds())
+    except (ValueError, TypeError):
+        return None
+
+
+@lru_cache(maxsize=256)
+def _parse_error_message(error_body):
+    """
+    Extract the 'message' field from a JSON error body (str or bytes).
+    Cached because retry storms repeat the same error bodies many times.
+    """
+    try:
+        error_json = _json_loads(error_body)
+    except (TypeError, ValueError):  # JSONDecodeError (stdlib and orjson) is a ValueError
+        return error_body.decode('utf-8', 'replace') if isinstance(error_body, bytes) else error_body
+    if isinstance(error_json, dict) and 'message' in error_json:
+        return str(error_json['message'])
+    return error_body.decode('utf-8', 'replace') if isinstance(error_body, bytes) else error_body
 
 
-def _categorize_api_error(exception: ApiException) -> Tuple[bool, str]:
+def _categorize_api_error(exception: ApiException) -> Tuple[bool, str, Optional[float]]:
     """
     Categorize an API exception to determine if it's retryable.
     
     Returns:
-        Tuple of (is_retryable: bool, error_message: str)
+        Tuple of (is_retryable: bool, error_message: str, retry_after: Optional[float])
+        where retry_after is the server-requested wait in seconds, if any
     """
     try:
-        status_code = exception.status if hasattr(exception, 'status') else None
-        error_body = exception.body if hasattr(exception, 'body') else str(exception)
+        status_code = getattr(exception, 'status', None)
+        error_body = getattr(exception, 'body', None)
         
-        # Try to parse error body as JSON for more details
-        try:
-            error_json = json.loads(error_body)
-            error_message = error_json.get('message', error_body)
-        except (json.JSONDecodeError, TypeError):
-            error_message = str(error_body)
+        # Only text bodies are worth parsing as JSON; dicts and empty bodies are handled directly
+        if isinstance(error_body, (bytes, str)) and error_body:
+            error_message = _parse_error_message(error_body)
+        elif isinstance(error_body, dict):
+            error_message = str(error_body.get('message', error_body))
+        else:
+            error_message = str(error_body) if error_body else str(exception)
         
         # Determine if retryable based on status code
+        if status_code in PERMANENT_ERROR_CODES:
+            return False, f"Permanent error (HTTP {status_code}): {error_message}", None
+        
+        retry_after = _parse_retry_after(getattr(exception, 'headers', None))
         if status_code in RETRYABLE_ERROR_CODES:
-            return True, f"Retryable error (HTTP {status_code}): {error_message}"
-        elif status_code in PERMANENT_ERROR_CODES:
-            return False, f"Permanent error (HTTP {status_code}): {error_message}"
+            return True, f"Retryable error (HTTP {status_code}): {error_message}", retry_after
         else:
             # Unknown error - be conservative and allow retry
-            return True, f"Unknown error (HTTP {status_code}): {error_message}"
+            return True, f"Unknown error (HTTP {status_code}): {error_message}", retry_after
             
     except Exception as e:
         # If we can't categorize, assume retryable to be safe
-        return True, f"Error categorization failed: {str(e)}"
+        return True, f"Error categorization failed: {str(e)}", None
 
 
-def retry_with_exponential_backoff(max_retries=MAX_RETRIES):
+def _compute_backoff_delay(attempt: int, jitter: str = 'full', prev_delay: Optional[float] = None) -> float:
+    """
+    Compute a randomized exponential backoff delay so concurrent retries don't wake up in lockstep.
+    
+    Args:
+        attempt: Zero-based attempt number
+        jitter: 'full' (uniform 0..cap), 'equal' (uniform cap/2..cap) or
+                'decorrelated' (uniform base..prev_delay*3, capped)
+        prev_delay: Previous delay, used by 'decorrelated' jitter
+        
+    Returns:
+        Delay in seconds
+    """
+    if jitter == 'decorrelated':
+        upper = (prev_delay or INITIAL_RETRY_DELAY) * 3
+        return min(MAX_RETRY_DELAY, random.uniform(INITIAL_RETRY_DELAY, upper))
+    
+    cap = min(INITIAL_RETRY_DELAY * (2 ** attempt), MAX_RETRY_DELAY)
+    if jitter == 'equal':
+        return random.uniform(cap * 0.5, cap)
+    return random.uniform(0, cap)
+
+
+def _retry_after_delay(retry_after: float) -> float:
+    """Delay for a server-provided Retry-After, with a little jitter and capped at MAX_RETRY_DELAY."""
+    return min(retry_after + random.uniform(0, 0.1 * INITIAL_RETRY_DELAY), MAX_RETRY_DELAY)
+
+
+def retry_with_exponential_backoff(max_retries=MAX_RETRIES, jitter='full'):
     """
     Decorator that implements exponential backoff retry logic for API calls.
+    
+    Args:
+        max_retries: Maximum number of attempts
+        jitter: Backoff randomization mode: 'full', 'equal' or 'decorrelated'
+    
+    The wrapped function accepts an extra cancel_event keyword (threading.Event, not
+    passed through). Setting it interrupts a backoff wait and raises CancelledError.
     """
+    if jitter not in ('full', 'equal', 'decorrelated'):
+        raise ValueError(f"Unknown jitter mode: {jitter}")
+    
     def decorator(func):
         @wraps(func)
-        def wrapper(*args, **kwargs):
+        def wrapper(*args, cancel_event: Optional[threading.Event] = None, **kwargs):
             last_exception = None
+            delay = None
+            
+            def wait(seconds):
+                if cancel_event is None:
+                    time.sleep(seconds)
+                elif cancel_event.wait(seconds):
+                    raise CancelledError(f"{func.__name__} cancelled during retry backoff")
             
             for attempt in range(max_retries):
+                if cancel_event is not None and cancel_event.is_set():
+                    raise CancelledError(f"{func.__name__} cancelled")
                 try:
                     return func(*args, **kwargs)
                     
                 except ApiException as e:
-                    is_retryable, error_msg = _categorize_api_error(e)
+                    is_retryable, error_msg, retry_after = _categorize_api_error(e)
                     last_exception = e
                     
                     if not is_retryable:
-                        logging.error(f"[EMAIL_TOOL] Permanent error in {func.__name__}: {error_msg}")
+                        logging.error("[EMAIL_TOOL] Permanent error in %s: %s", func.__name__, error_msg)
                         raise  # Don't retry permanent errors
                     
                     if attempt < max_retries - 1:  # Don't sleep on last attempt
-                        delay = min(INITIAL_RETRY_DELAY * (2 ** attempt), MAX_RETRY_DELAY)
+                        # Prefer the server's Retry-After over blind exponential backoff
+                        if retry_after is not None:
+                            delay = _retry_after_delay(retry_after)
+                        else:
+                            delay = _compute_backoff_delay(attempt, jitter, delay)
                         logging.warning(
-                            f"[EMAIL_TOOL] Attempt {attempt + 1}/{max_retries} failed for {func.__name__}: {error_msg}. "
-                            f"Retrying in {delay}s..."
+                            "[EMAIL_TOOL] Attempt %d/%d failed for %s: %s. Retrying in %.2fs...",
+                            attempt + 1, max_retries, func.__name__, error_msg, delay
                         )
-                        time.sleep(delay)
+                        wait(delay)
                     else:
                         logging.error(
-                            f"[EMAIL_TOOL] All {max_retries} attempts failed for {func.__name__}: {error_msg}"
+                            "[EMAIL_TOOL] All %d attempts failed for %s: %s", max_retries, func.__name__, error_msg
                         )
                         
                 except Exception as e:
@@ -128,15 +339,15 @@ def retry_with_exponential_backoff(max_retries=MAX_RETRIES):
                     last_exception = e
                     
                     if attempt < max_retries - 1:
-                        delay = min(INITIAL_RETRY_DELAY * (2 ** attempt), MAX_RETRY_DELAY)
+                        delay = _compute_backoff_delay(attempt, jitter, delay)
                         logging.warning(
-                            f"[EMAIL_TOOL] Attempt {attempt + 1}/{max_retries} failed for {func.__name__}: {str(e)}. "
-                            f"Retrying in {delay}s..."
+                            "[EMAIL_TOOL] Attempt %d/%d failed for %s: %s. Retrying in %.2fs...",
+                            attempt + 1, max_retries, func.__name__, e, delay
                         )
-                        time.sleep(delay)
+                        wait(delay)
                     else:
                         logging.error(
-                            f"[EMAIL_TOOL] All {max_retries} attempts failed for {func.__name__}: {str(e)}"
+                            "[EMAIL_TOOL] All %d attempts failed for %s: %s", max_retries, func.__name__, e
                         )
             
             # If we get here, all retries failed
@@ -152,39 +363,56 @@ def _build_message_versions(messages):
     for bulk batch sends.
 
     :param messages: List of dicts with keys 'to_email', 'to_name', 'subject', 'body'
+                     and optionally a pre-rendered 'html_body' (skips newline conversion)
     :return: List of sib_api_v3_sdk.SendSmtpEmailMessageVersions
     """
     versions = []
+    append = versions.append
+    # Bind the SDK model classes once; the loop builds two models per message
+    To = sib_api_v3_sdk.SendSmtpEmailTo
+    MessageVersion = sib_api_v3_sdk.SendSmtpEmailMessageVersions
+    debug_enabled = logging.getLogger().isEnabledFor(logging.DEBUG)
+    # Consecutive messages often share one template body; convert it only once
+    last_body = None
+    last_html = None
 
     for i, msg in enumerate(messages):
         to_email = msg['to_email']
         to_name = msg.get('to_name', '')
         subject = msg.get('subject', '')
         body = msg.get('body', '')
-        html_body = body.replace('\n', '<br>')
+        html_body = msg.get('html_body')
+        if html_body is None:
+            if body != last_body:
+                last_body = body
+                last_html = body.replace('\n', '<br>')
+            html_body = last_html
         
         # Enhanced logging to track what's being built (defensive slicing)
-        logging.debug(f"[EMAIL_TOOL] Building version {i+1}: to={(to_email or '')}, subject='{(subject or '')[:50]}...', body_len={len(body or '')}")
+        if debug_enabled:
+            logging.debug(
+                "[EMAIL_TOOL] Building version %d: to=%s, subject='%.50s...', body_len=%d",
+                i + 1, to_email or '', subject or '', len(body or '')
+            )
         
         if not subject:
-            logging.warning(f"[EMAIL_TOOL] Message {i+1} has empty subject for {to_email}")
+            logging.warning("[EMAIL_TOOL] Message %d has empty subject for %s", i + 1, to_email)
         if not body:
-            logging.warning(f"[EMAIL_TOOL] Message {i+1} has empty body for {to_email}")
+            logging.warning("[EMAIL_TOOL] Message %d has empty body for %s", i + 1, to_email)
 
         # Create nested SDK model objects
-        to_obj = sib_api_v3_sdk.SendSmtpEmailTo(email=to_email, name=to_name)
-        version_obj = sib_api_v3_sdk.SendSmtpEmailMessageVersions(
-            to=[to_obj],
+        append(MessageVersion(
+            to=[To(email=to_email, name=to_name)],
             subject=subject,
             html_content=html_body
-        )
-        versions.append(version_obj)
+        ))
     
-    logging.info(f"[EMAIL_TOOL] Built {len(versions)} message versions")
+    logging.info("[EMAIL_TOOL] Built %d message versions", len(versions))
     return versions
 
 
-def send_email_message(sender_email, sender_name, to_email, to_name, subject, body, attachments=None):
+def send_email_message(sender_email, sender_name, to_email, to_name, subject, body, attachments=None,
+                       html_body=None):
     """
     Send a single transactional email with retry logic.
     
@@ -196,6 +424,7 @@ def send_email_message(sender_email, sender_name, to_email, to_name, subject, bo
         subject: Email subject
         body: Email body (plain text, will be converted to HTML)
         attachments: Optional list of file paths to attach
+        html_body: Optional pre-rendered HTML body; when given, body is not converted
         
     Returns:
         Dictionary with 'status' (success/error) and additional info
@@ -203,36 +432,31 @@ def send_email_message(sender_email, sender_name, to_email, to_name, subject, bo
     # Input validation
     if not to_email or '@' not in to_email:
         error_msg = f"Invalid email address: {to_email}"
-        logging.error(f"[EMAIL_TOOL] {error_msg}")
+        logging.error("[EMAIL_TOOL] %s", error_msg)
         return {'status': 'error', 'message': error_msg}
     
-    return _send_email_message_with_retry(sender_email, sender_name, to_email, to_name, subject, body, attachments)
+    return _send_email_message_with_retry(sender_email, sender_name, to_email, to_name, subject, body, attachments,
+                                          html_body)
 
 
 @retry_with_exponential_backoff(max_retries=MAX_RETRIES)
-def _send_email_message_with_retry(sender_email, sender_name, to_email, to_name, subject, body, attachments=None):
+def _send_email_message_with_retry(sender_email, sender_name, to_email, to_name, subject, body, attachments=None,
+                                   html_body=None):
     """Internal function with retry decorator applied."""
-    configuration = sib_api_v3_sdk.Configuration()
-    configuration.api_key['api-key'] = BREVO_API_KEY
-    api = sib_api_v3_sdk.TransactionalEmailsApi(sib_api_v3_sdk.ApiClient(configuration))
+    api = _get_api()
 
     # Process attachments
     attachment_list = []
     if attachments:
         for path in attachments:
             try:
-                with open(path, 'rb') as f:
-                    data = f.read()
-                encoded = base64.b64encode(data).decode('utf-8')
-                attachment_list.append({
-                    'content': encoded,
-                    'name': os.path.basename(path)
-                })
+                attachment_list.append(_encode_attachment(path))
             except Exception as e:
-                logging.error(f"[EMAIL_TOOL] Failed to process attachment {path}: {e}")
+                logging.error("[EMAIL_TOOL] Failed to process attachment %s: %s", path, e)
                 _log_failed_email_to_file(sender_email, to_email, subject, body, f"Attachment error: {str(e)}")
 
-    html_body = body.replace('\n', '<br>')
+    if html_body is None:
+        html_body = body.replace('\n', '<br>')
     email_args = {
         'sender': {'email': sender_email, 'name': sender_name},
         'to': [ {'email': to_email, 'name': to_name} ],
@@ -246,10 +470,10 @@ def _send_email_message_with_retry(sender_email, sender_name, to_email, to_name,
 
     try:
         response = api.send_transac_email(email_model)
-        logging.info(f"[EMAIL_TOOL] Successfully sent email to {to_email}")
+        logging.info("[EMAIL_TOOL] Successfully sent email to %s", to_email)
         return {'status': 'success', 'response': response}
     except ApiException as e:
-        is_retryable, err_msg = _categorize_api_error(e)
+        is_retryable, err_msg, retry_after = _categorize_api_error(e)
         _log_failed_email_to_file(sender_email, to_email, subject, body, err_msg)
         
         # Re-raise to trigger retry logic
@@ -257,7 +481,7 @@ def _send_email_message_with_retry(sender_email, sender_name, to_email, to_name,
 
 
 def send_bulk_email_messages(sender_email, sender_name, messages, attachments=None, chunk_size=None, 
-                              progress_callback=None):
+                              progress_callback=None, cancel_event=None):
     """
     Send multiple transactional emails in one or more batch calls with retry logic and progress tracking.
     Automatically splits the message list into chunks to respect API limits.
@@ -267,9 +491,12 @@ def send_bulk_email_messages(sender_email, sender_name, messages, attachments=No
         sender_name: Sender's display name  
         messages: List of message dictionaries with keys 'to_email', 'to_name', 'subject', 'body'
                   Each message MUST have a 'subject' and 'body' key for personalization
+                  An optional 'html_body' key supplies pre-rendered HTML for that message
         attachments: Optional list of attachment file paths
         chunk_size: Maximum messages per API call (default DEFAULT_CHUNK_SIZE)
         progress_callback: Optional callback function(current, total, message) for progress updates
+        cancel_event: Optional threading.Event; setting it stops retry waits and unsent chunks,
+                      which are then reported as failed
     
     Returns:
         Dictionary with:
@@ -283,6 +510,7 @@ def send_bulk_email_messages(sender_email, sender_name, messages, attachments=No
             - failed_count: Number of failed emails (int)
             - failed_emails: List of failed email addresses (strings)
             - duplicates_removed: Number of duplicate emails removed (int)
+            - cancelled: True if the send was cancelled via cancel_event (bool)
     
     Note:
         This function is called by streamlit_app.py with chunk_size=500 and progress_callback.
@@ -290,7 +518,7 @@ def send_bulk_email_messages(sender_email, sender_name, messages, attachments=No
         Message IDs align with messages list order (accounting for failed sends).
             - failed_emails: List of failed email addresses
     """
-    logging.info(f"[EMAIL_TOOL] Starting bulk email send for {len(messages)} messages")
+    logging.info("[EMAIL_TOOL] Starting bulk email send for %d messages", len(messages))
     
     if not messages:
         logging.warning("[EMAIL_TOOL] No messages provided for sending")
@@ -312,13 +540,13 @@ def send_bulk_email_messages(sender_email, sender_name, messages, attachments=No
     duplicates_removed = len(messages) - len(unique_messages)
     
     if duplicates_removed > 0:
-        logging.info(f"[EMAIL_TOOL] Removed {duplicates_removed} duplicate email addresses")
+        logging.info("[EMAIL_TOOL] Removed %d duplicate email addresses", duplicates_removed)
         if progress_callback:
             progress_callback(0, len(unique_messages), 
                             f"Removed {duplicates_removed} duplicate email addresses")
     
     total_messages = len(unique_messages)
-    logging.info(f"[EMAIL_TOOL] Total unique messages to send: {total_messages}")
+    logging.info("[EMAIL_TOOL] Total unique messages to send: %d", total_messages)
     
     successful_sends = 0
     failed_sends = 0
@@ -328,56 +556,77 @@ def send_bulk_email_messages(sender_email, sender_name, messages, attachments=No
     # Process attachments once for all chunks
     attachment_list = []
     if attachments:
-        logging.info(f"[EMAIL_TOOL] Processing {len(attachments)} attachment(s)")
+        logging.info("[EMAIL_TOOL] Processing %d attachment(s)", len(attachments))
         attachment_list = _process_attachments(attachments, sender_email)
-        logging.info(f"[EMAIL_TOOL] Successfully processed {len(attachment_list)} attachment(s)")
+        logging.info("[EMAIL_TOOL] Successfully processed %d attachment(s)", len(attachment_list))
+    
+    # Attachments are sent with every chunk, so they shrink the room left for message versions
+    if unique_messages:
+        max_fitting = _max_messages_per_request(unique_messages[0], attachment_list)
+        if max_fitting < chunk_size:
+            logging.info(
+                "[EMAIL_TOOL] Reducing chunk size from %d to %d to stay under the %d byte request limit",
+                chunk_size, max_fitting, MAX_REQUEST_SIZE_BYTES
+            )
+            chunk_size = max_fitting
     
     # Chunk the messages and process each chunk
     # Note: Each message has its own subject and body for personalization
-    total_chunks = (total_messages + chunk_size - 1) // chunk_size
-    logging.info(f"[EMAIL_TOOL] Splitting into {total_chunks} chunk(s) of max {chunk_size} messages each")
+    chunks = [
+        ((chunk_idx // chunk_size) + 1, chunk_idx, unique_messages[chunk_idx:chunk_idx + chunk_size])
+        for chunk_idx in range(0, total_messages, chunk_size)
+    ]
+    total_chunks = len(chunks)
+    max_workers = max(1, min(MAX_CONCURRENT_CHUNKS, total_chunks))
+    logging.info(
+        "[EMAIL_TOOL] Splitting into %d chunk(s) of max %d messages each, sending up to %d concurrently",
+        total_chunks, chunk_size, max_workers
+    )
     
-    for chunk_idx in range(0, total_messages, chunk_size):
-        chunk = unique_messages[chunk_idx:chunk_idx + chunk_size]
-        chunk_num = (chunk_idx // chunk_size) + 1
-        
-        logging.info(f"[EMAIL_TOOL] Processing chunk {chunk_num}/{total_chunks}: messages {chunk_idx} to {chunk_idx+len(chunk)}")
-        
-        if progress_callback:
-            progress_callback(successful_sends, total_messages, 
-                            f"Processing chunk {chunk_num}/{total_chunks}...")
-        
-        try:
-            # Send chunk with retry logic (each message has its own subject/body)
-            chunk_result = _send_email_chunk_with_retry(
-                sender_email, sender_name, chunk, attachment_list
-            )
-            
-            # Process successful sends
-            message_ids = chunk_result.get('message_ids', [])
-            all_message_ids.extend(message_ids)
-            successful_sends += len(message_ids)
+    if progress_callback:
+        progress_callback(successful_sends, total_messages, 
+                        f"Sending {total_chunks} chunk(s)...")
+    
+    # Chunks are sent by worker threads (the work is network-bound); results are
+    # aggregated here on the calling thread so progress_callback stays on the UI thread.
+    chunk_message_ids = {}
+    
+    for (chunk_num, chunk_idx, chunk), chunk_result, error in _iter_chunk_results(
+        chunks, sender_email, sender_name, attachment_list, max_workers, cancel_event
+    ):
+        if isinstance(error, CancelledError):
+            # Cancelled by the caller before or while retrying; nothing in the chunk was sent
+            logging.warning("[EMAIL_TOOL] Chunk %d cancelled", chunk_num)
+            failed_sends += len(chunk)
+            failed_emails.extend([msg['to_email'] for msg in chunk])
             
-            logging.info(f"[EMAIL_TOOL] Chunk {chunk_num} sent successfully: {len(message_ids)} emails")
+            for msg in chunk:
+                _log_failed_email_to_file(
+                    sender_email, msg['to_email'], msg.get('subject', ''), msg.get('body', ''),
+                    f"Chunk {chunk_num} cancelled"
+                )
             
             if progress_callback:
                 progress_callback(successful_sends, total_messages, 
-                                f"Chunk {chunk_num} completed: {len(message_ids)} emails sent")
+                                f"⚠️ Chunk {chunk_num} cancelled")
             
-        except ApiException as e:
+            continue
+            
+        elif isinstance(error, ApiException):
             # Chunk failed after all retries
-            is_retryable, err_msg = _categorize_api_error(e)
-            logging.error(f"[EMAIL_TOOL] Chunk {chunk_num} failed permanently: {err_msg}")
+            is_retryable, err_msg, retry_after = _categorize_api_error(error)
+            logging.error("[EMAIL_TOOL] Chunk %d failed permanently: %s", chunk_num, err_msg)
             
             # Mark all emails in this chunk as failed
             failed_sends += len(chunk)
             failed_emails.extend([msg['to_email'] for msg in chunk])
             
-            _log_failed_email_to_file(
-                sender_email, "Bulk Send", "Batch Send Failed", 
-                f"Chunk {chunk_num} (messages {chunk_idx} to {chunk_idx+len(chunk)})", 
-                err_msg
-            )
+            # One dead-letter record per recipient so the failures can be re-sent
+            for msg in chunk:
+                _log_failed_email_to_file(
+                    sender_email, msg['to_email'], msg.get('subject', ''), msg.get('body', ''),
+                    f"Chunk {chunk_num} failed: {err_msg}"
+                )
             
             if progress_callback:
                 progress_callback(successful_sends, total_messages, 
@@ -386,21 +635,40 @@ def send_bulk_email_messages(sender_email, sender_name, messages, attachments=No
             # Continue processing other chunks
             continue
             
-        except Exception as e:
+        elif error is not None:
             # Unexpected error
-            logging.error(f"[EMAIL_TOOL] Unexpected error in chunk {chunk_num}: {str(e)}")
+            logging.error("[EMAIL_TOOL] Unexpected error in chunk %d: %s", chunk_num, error)
             failed_sends += len(chunk)
             failed_emails.extend([msg['to_email'] for msg in chunk])
             
+            for msg in chunk:
+                _log_failed_email_to_file(
+                    sender_email, msg['to_email'], msg.get('subject', ''), msg.get('body', ''),
+                    f"Chunk {chunk_num} failed unexpectedly: {str(error)}"
+                )
+            
             if progress_callback:
                 progress_callback(successful_sends, total_messages, 
                                 f"⚠️ Chunk {chunk_num} failed unexpectedly")
             
             continue
         
-        # Rate limiting: Add delay between chunks
-        if chunk_idx + chunk_size < total_messages:
-            time.sleep(CHUNK_DELAY)
+        # Process successful sends
+        message_ids = chunk_result.get('message_ids', [])
+        chunk_message_ids[chunk_num] = message_ids
+        successful_sends += len(message_ids)
+        
+        logging.info(
+            "[EMAIL_TOOL] Chunk %d/%d sent successfully: %d emails", chunk_num, total_chunks, len(message_ids)
+        )
+        
+        if progress_callback:
+            progress_callback(successful_sends, total_messages, 
+                            f"Chunk {chunk_num} completed: {len(message_ids)} emails sent")
+    
+    # Keep message IDs in message order regardless of chunk completion order
+    for chunk_num, _, _ in chunks:
+        all_message_ids.extend(chunk_message_ids.get(chunk_num, []))
     
     # Determine overall status
     if failed_sends == 0:
@@ -411,8 +679,8 @@ def send_bulk_email_messages(sender_email, sender_name, messages, attachments=No
         status = 'partial'
     
     logging.info(
-        f"[EMAIL_TOOL] Bulk send completed: {successful_sends} sent, {failed_sends} failed "
-        f"out of {total_messages} ({duplicates_removed} duplicates removed)"
+        "[EMAIL_TOOL] Bulk send completed: %d sent, %d failed out of %d (%d duplicates removed)",
+        successful_sends, failed_sends, total_messages, duplicates_removed
     )
     
     return {
@@ -422,10 +690,315 @@ def send_bulk_email_messages(sender_email, sender_name, messages, attachments=No
         'message_ids': all_message_ids,
         'failed_count': failed_sends,
         'failed_emails': failed_emails,
-        'duplicates_removed': duplicates_removed
+        'duplicates_removed': duplicates_removed,
+        'cancelled': cancel_event is not None and cancel_event.is_set()
     }
 
 
+class BufferedSender:
+    """
+    Opt-in sender that coalesces individual sends into batched Brevo calls.
+    
+    Messages passed to send() are queued; a background thread dispatches them as
+    one message_versions request when max_batch messages are pending or
+    max_wait_ms has passed since the first pending message, whichever comes first.
+    Useful when callers send one recipient at a time (e.g. from a form loop).
+    
+    Usage:
+        with BufferedSender(sender_email, sender_name) as sender:
+            future = sender.send(to_email, to_name, subject, body)
+            message_id = future.result()
+    """
+    
+    _STOP = object()
+    
+    def __init__(self, sender_email: str, sender_name: str, attachments: Optional[List[str]] = None,
+                 max_batch: int = 500, max_wait_ms: int = 50):
+        """
+        Args:
+            sender_email: Sender's email address
+            sender_name: Sender's display name
+            attachments: Optional list of attachment file paths added to every batch
+            max_batch: Maximum messages per API call (lowered per batch when attachments and message
+                size would exceed MAX_REQUEST_SIZE_BYTES, as in send_bulk_email_messages)
+            max_wait_ms: Maximum time (ms) the first queued message waits for others
+        """
+        self.sender_email = sender_email
+        self.sender_name = sender_name
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000.0
+        self._attachment_list = _process_attachments(attachments, sender_email) if attachments else []
+        self._queue = queue.Queue()
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="BufferedSender", daemon=True)
+        self._thread.start()
+    
+    def send(self, to_email: str, to_name: str, subject: str, body: str) -> Future:
+        """
+        Queue one email for batched sending.
+        
+        Returns:
+            Future resolving to the Brevo message ID (or raising the send error)
+        """
+        if self._closed.is_set():
+            raise RuntimeError("BufferedSender is closed")
+        
+        future = Future()
+        if not to_email or '@' not in to_email:
+            future.set_exception(ValueError(f"Invalid email address: {to_email}"))
+            return future
+        
+        message = {'to_email': to_email, 'to_name': to_name, 'subject': subject, 'body': body}
+        self._queue.put((message, future))
+        return future
+    
+    def close(self, timeout: Optional[float] = None):
+        """Flush pending messages and stop the background thread."""
+        if not self._closed.is_set():
+            self._closed.set()
+            self._queue.put(self._STOP)
+        self._thread.join(timeout)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is self._STOP:
+                break
+            
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            
+            self._dispatch(batch)
+    
+    def _dispatch(self, batch):
+        # Skip messages whose futures were cancelled while queued
+        batch = [(message, future) for message, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        
+        # Attachments go out with every request, so they shrink the room left for message versions
+        per_request = _max_messages_per_request(batch[0][0], self._attachment_list)
+        for start in range(0, len(batch), per_request):
+            self._send_batch(batch[start:start + per_request])
+    
+    def _send_batch(self, batch):
+        messages = [message for message, _ in batch]
+        logging.info("[EMAIL_TOOL] BufferedSender dispatching batch of %d message(s)", len(messages))
+        try:
+            result = _send_email_chunk_with_retry(
+                self.sender_email, self.sender_name, messages, self._attachment_list
+            )
+        except Exception as e:
+            for message, future in batch:
+                _log_failed_email_to_file(
+                    self.sender_email, message['to_email'], message['subject'], message['body'], str(e)
+                )
+                future.set_exception(e)
+            return
+        
+        message_ids = result.get('message_ids', [])
+        for i, (_, future) in enumerate(batch):
+            future.set_result(message_ids[i] if i < len(message_ids) else None)
+
+
+class _RequestPacer:
+    """
+    Thread-safe pacer that spaces out API calls by a minimum interval.
+    Each caller reserves the next start slot, so concurrent workers never start
+    requests closer together than the interval. Because slots are measured from
+    request starts, time spent inside the API call counts toward the interval.
+    
+    Callers may report observed latencies via record_latency(); when the latency
+    EWMA climbs to 2x the baseline (the API is slowing down), the interval is
+    stretched proportionally (up to MAX_BACKOFF_FACTOR) as backpressure.
+    """
+    
+    EWMA_ALPHA = 0.3
+    MAX_BACKOFF_FACTOR = 4.0
+    
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_start = time.monotonic()
+        self._baseline_latency = None
+        self._ewma_latency = None
+    
+    def _current_interval(self) -> float:
+        if not self._baseline_latency or self._ewma_latency is None:
+            return self.interval
+        factor = self._ewma_latency / self._baseline_latency
+        if factor < 2.0:
+            return self.interval
+        return self.interval * min(factor, self.MAX_BACKOFF_FACTOR)
+    
+    def wait(self, cancel_event: Optional[threading.Event] = None):
+        """
+        Block until this caller's reserved start slot.
+        Raises CancelledError if cancel_event is (or becomes) set, without waiting out the slot.
+        """
+        if cancel_event is not None and cancel_event.is_set():
+            raise CancelledError("Cancelled before pacing wait")
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self._current_interval()
+        if start <= now:
+            return
+        if cancel_event is None:
+            time.sleep(start - now)
+        elif cancel_event.wait(start - now):
+            raise CancelledError("Cancelled during pacing wait")
+    
+    def record_latency(self, latency: float):
+        """Feed an observed request latency (seconds) into the backpressure EWMA."""
+        with self._lock:
+            if self._ewma_latency is None:
+                self._ewma_latency = latency
+            else:
+                self._ewma_latency += self.EWMA_ALPHA * (latency - self._ewma_latency)
+            if self._baseline_latency is None or latency < self._baseline_latency:
+                self._baseline_latency = latency
+
+
+class _TokenBucket:
+    """
+    Thread-safe token bucket limiting the average API call rate.
+    Up to `burst` calls may start back-to-back; beyond that, callers wait for
+    tokens refilled at `rate` per second. Unlike a fixed sleep before every call,
+    callers only wait when the budget is actually exhausted.
+    """
+    
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+    
+    def acquire(self):
+        """Take one token, blocking until one is available."""
+        if self.rate <= 0:
+            return  # Rate limiting disabled
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            # Take the token now (possibly going negative) so concurrent callers queue up
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
+
+# Shared by every Brevo call in the process (chunk sends and event lookups)
+_BREVO_BUCKET = _TokenBucket(
+    rate=1.0 / RATE_LIMIT_DELAY if RATE_LIMIT_DELAY > 0 else 0.0, burst=RATE_LIMIT_BURST
+)
+
+
+def _send_paced_chunk(pacer: _RequestPacer, sender_email: str, sender_name: str, chunk: List[Dict],
+                      attachment_list: List[Dict], cancel_event: Optional[threading.Event] = None) -> Dict:
+    """Wait for a pacing slot, then send the chunk with retry logic (runs in a worker thread)."""
+    pacer.wait(cancel_event)
+    started = time.monotonic()
+    try:
+        return _send_email_chunk_with_retry(
+            sender_email, sender_name, chunk, attachment_list, cancel_event=cancel_event
+        )
+    finally:
+        pacer.record_latency(time.monotonic() - started)
+
+
+def _iter_chunk_results(chunks, sender_email: str, sender_name: str, attachment_list: List[Dict],
+                        max_workers: int, cancel_event: Optional[threading.Event] = None):
+    """
+    Send chunks and yield ((chunk_num, chunk_idx, chunk), result, error) as each one finishes.
+    
+    A single chunk (the common case) is sent directly on the calling thread; multiple
+    chunks go through a thread pool, with a pacer keeping chunk starts at least
+    CHUNK_DELAY apart for rate limiting.
+    """
+    if len(chunks) == 1:
+        chunk_info = chunks[0]
+        try:
+            yield chunk_info, _send_email_chunk_with_retry(
+                sender_email, sender_name, chunk_info[2], attachment_list, cancel_event=cancel_event
+            ), None
+        except Exception as e:
+            yield chunk_info, None, e
+        return
+    
+    pacer = _RequestPacer(CHUNK_DELAY)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(
+                _send_paced_chunk, pacer, sender_email, sender_name, chunk, attachment_list, cancel_event
+            ): (chunk_num, chunk_idx, chunk)
+            for chunk_num, chunk_idx, chunk in chunks
+        }
+        for future in as_completed(futures):
+            error = future.exception()
+            yield futures[future], (None if error else future.result()), error
+
+
+def _estimate_message_bytes(msg: Dict) -> int:
+    """Estimate the serialized size of one message version (HTML body, subject and recipient)."""
+    html_body = msg.get('html_body')
+    if html_body is None:
+        body = msg.get('body', '') or ''
+        html_len = len(body) + 3 * body.count('\n')  # each newline becomes '<br>'
+    else:
+        html_len = len(html_body)
+    return (
+        html_len + len(msg.get('subject', '') or '') + len(msg.get('to_email', '') or '')
+        + len(msg.get('to_name', '') or '') + MESSAGE_VERSION_OVERHEAD_BYTES
+    )
+
+
+def _max_messages_per_request(sample_msg: Dict, attachment_list: List[Dict]) -> int:
+    """
+    Estimate how many message versions fit in one request alongside the attachments.
+    
+    Args:
+        sample_msg: A representative message used for the per-message size estimate
+        attachment_list: Processed attachments (base64 'content'), sent with every chunk
+    
+    Returns:
+        Maximum messages per request (at least 1)
+    """
+    attach_bytes = sum(len(a['content']) for a in attachment_list)
+    # The first message's HTML is also sent as the global html_content
+    msg_bytes = _estimate_message_bytes(sample_msg)
+    available = MAX_REQUEST_SIZE_BYTES - attach_bytes - msg_bytes
+    if available < msg_bytes:
+        logging.warning(
+            "[EMAIL_TOOL] Attachments (%d bytes) leave almost no room under the %d byte request limit; "
+            "sending one message per request",
+            attach_bytes, MAX_REQUEST_SIZE_BYTES
+        )
+        return 1
+    return available // msg_bytes
+
+
 def _deduplicate_messages(messages: List[Dict]) -> List[Dict]:
     """
     Remove duplicate email addresses from message list, keeping the first occurrence.
@@ -436,18 +1009,46 @@ def _deduplicate_messages(messages: List[Dict]) -> List[Dict]:
     Returns:
         List of unique messages
     """
-    seen_emails = set()
-    unique_messages = []
-    
+    # Dict keyed by normalized address keeps the first message per address, in order
+    unique_by_email = {}
     for msg in messages:
-        email = msg.get('to_email', '').lower().strip()
-        if email and email not in seen_emails:
-            seen_emails.add(email)
-            unique_messages.append(msg)
-        elif email in seen_emails:
-            logging.debug(f"[EMAIL_TOOL] Skipping duplicate email: {email}")
+        email_key = (msg.get('to_email') or '').strip().lower()
+        if email_key:
+            unique_by_email.setdefault(email_key, msg)
+    
+    skipped = len(messages) - len(unique_by_email)
+    if skipped:
+        logging.debug("[EMAIL_TOOL] Skipped %d duplicate or empty email address(es)", skipped)
     
-    return unique_messages
+    return list(unique_by_email.values())
+
+
+def _encode_attachment(path: str) -> Dict:
+    """
+    Base64-encode an attachment file into a Brevo attachment dict ('content', 'name').
+    
+    Results are cached by (path, mtime, size), so repeated sends of the same
+    unchanged file (single or bulk) skip the read and encode.
+    """
+    file_stat = os.stat(path)
+    return dict(_encode_attachment_cached(path, file_stat.st_mtime_ns, file_stat.st_size))
+
+
+@lru_cache(maxsize=64)
+def _encode_attachment_cached(path: str, mtime_ns: int, size: int) -> Dict:
+    """
+    Encode a file for _encode_attachment; mtime_ns and size are part of the cache key.
+    The file is memory-mapped so the raw bytes are not copied onto the heap
+    alongside the encoded string.
+    """
+    with open(path, 'rb') as f:
+        if size == 0:
+            encoded = ''  # mmap cannot map an empty file
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                encoded = base64.b64encode(mm).decode('ascii')
+    
+    return {'content': encoded, 'name': os.path.basename(path)}
 
 
 def _process_attachments(attachments: List[str], sender_email: str) -> List[Dict]:
@@ -466,28 +1067,22 @@ def _process_attachments(attachments: List[str], sender_email: str) -> List[Dict
     for path in attachments:
         try:
             if not os.path.exists(path):
-                logging.error(f"[EMAIL_TOOL] Attachment file not found: {path}")
+                logging.error("[EMAIL_TOOL] Attachment file not found: %s", path)
                 continue
                 
             file_size = os.path.getsize(path)
             if file_size > MAX_ATTACHMENT_SIZE_BYTES:
                 logging.error(
-                    f"[EMAIL_TOOL] Attachment too large ({file_size / (1024*1024):.2f}MB, "
-                    f"max {EMAIL_MAX_ATTACHMENT_SIZE_MB}MB): {path}"
+                    "[EMAIL_TOOL] Attachment too large (%.2fMB, max %dMB): %s",
+                    file_size / (1024 * 1024), EMAIL_MAX_ATTACHMENT_SIZE_MB, path
                 )
                 continue
             
-            with open(path, 'rb') as f:
-                data = f.read()
-            encoded = base64.b64encode(data).decode('utf-8')
-            attachment_list.append({
-                'content': encoded,
-                'name': os.path.basename(path)
-            })
-            logging.info(f"[EMAIL_TOOL] Processed attachment: {os.path.basename(path)} ({file_size / 1024:.1f}KB)")
+            attachment_list.append(_encode_attachment(path))
+            logging.info("[EMAIL_TOOL] Processed attachment: %s (%.1fKB)", os.path.basename(path), file_size / 1024)
             
         except Exception as e:
-            logging.error(f"[EMAIL_TOOL] Failed to process attachment {path}: {e}")
+            logging.error("[EMAIL_TOOL] Failed to process attachment %s: %s", path, e)
             _log_failed_email_to_file(sender_email, "N/A", "Attachment Error", "", str(e))
     
     return attachment_list
@@ -514,9 +1109,7 @@ def _send_email_chunk_with_retry(sender_email: str, sender_name: str, chunk: Lis
         logging.warning("[EMAIL_TOOL] _send_email_chunk_with_retry called with empty chunk, skipping")
         return {'message_ids': []}
     
-    configuration = sib_api_v3_sdk.Configuration()
-    configuration.api_key['api-key'] = BREVO_API_KEY
-    api = sib_api_v3_sdk.TransactionalEmailsApi(sib_api_v3_sdk.ApiClient(configuration))
+    api = _get_api()
     
     # Build versions for the current chunk (each with its own subject/body)
     versions = _build_message_versions(chunk)
@@ -525,9 +1118,12 @@ def _send_email_chunk_with_retry(sender_email: str, sender_name: str, chunk: Lis
     # Each message_version will override these with its own subject/html_content
     first_msg = chunk[0]
     global_subject = first_msg.get('subject', 'No Subject')
-    global_html = first_msg.get('body', '').replace('\n', '<br>')
+    global_html = versions[0].html_content
     
-    logging.info(f"[EMAIL_TOOL] Sending chunk with {len(chunk)} messages, global subject: '{(global_subject or 'No Subject')[:50]}...'")
+    logging.info(
+        "[EMAIL_TOOL] Sending chunk with %d messages, global subject: '%.50s...'",
+        len(chunk), global_subject or 'No Subject'
+    )
     
     # Build batch request
     # Note: Brevo requires global subject/html_content as fallbacks even when using message_versions
@@ -541,37 +1137,36 @@ def _send_email_chunk_with_retry(sender_email: str, sender_name: str, chunk: Lis
     # Only add attachments if present
     if attachment_list and len(attachment_list) > 0:
         batch_args['attachment'] = attachment_list
-        logging.info(f"[EMAIL_TOOL] Adding {len(attachment_list)} attachment(s) to chunk")
     
     # Rate limiting before API call
-    time.sleep(RATE_LIMIT_DELAY)
+    _BREVO_BUCKET.acquire()
     
-    logging.debug(f"[EMAIL_TOOL] Calling Brevo API with sender={sender_email}, {len(versions)} versions")
+    logging.debug("[EMAIL_TOOL] Calling Brevo API with sender=%s, %d versions", sender_email, len(versions))
     
     try:
         response = api.send_transac_email(sib_api_v3_sdk.SendSmtpEmail(**batch_args))
         
         # Extract message IDs from response
         message_ids = _extract_message_ids(response, len(chunk))
-        logging.info(f"[EMAIL_TOOL] Chunk sent successfully, received {len(message_ids)} message IDs")
+        logging.info("[EMAIL_TOOL] Chunk sent successfully, received %d message IDs", len(message_ids))
         
         return {'message_ids': message_ids}
         
     except ApiException as e:
         # Log full context before re-raising for retry logic
-        recipient_list = [msg['to_email'] for msg in chunk]
+        recipient_list = [msg['to_email'] for msg in chunk[:5]]
         logging.error(
-            f"[EMAIL_TOOL] API call failed for chunk with {len(chunk)} recipients: {recipient_list[:5]}... "
-            f"Status: {getattr(e, 'status', 'unknown')}, Body: {getattr(e, 'body', str(e))}"
+            "[EMAIL_TOOL] API call failed for chunk with %d recipients: %s... Status: %s, Body: %s",
+            len(chunk), recipient_list, getattr(e, 'status', 'unknown'), getattr(e, 'body', str(e))
         )
         raise  # Re-raise to trigger retry logic
         
     except Exception as e:
         # Log unexpected errors with full context
-        recipient_list = [msg['to_email'] for msg in chunk]
+        recipient_list = [msg['to_email'] for msg in chunk[:5]]
         logging.error(
-            f"[EMAIL_TOOL] Unexpected error sending chunk to {len(chunk)} recipients: {recipient_list[:5]}... "
-            f"Error: {type(e).__name__}: {str(e)}", 
+            "[EMAIL_TOOL] Unexpected error sending chunk to %d recipients: %s... Error: %s: %s",
+            len(chunk), recipient_list, type(e).__name__, e,
             exc_info=True
         )
         raise  # Re-raise to trigger retry logic
@@ -588,28 +1183,162 @@ def _extract_message_ids(response, expected_count: int) -> List[str]:
     Returns:
         List of message ID strings
     """
-    message_ids = []
+    # Read the attributes directly; to_dict() would walk and copy the whole response model
+    message_ids = getattr(response, 'message_ids', None) or getattr(response, 'messageIds', None)
+    if not message_ids and isinstance(response, dict):
+        message_ids = response.get('messageIds') or response.get('message_ids')
+    if not message_ids:
+        message_id = getattr(response, 'message_id', None)
+        if message_id:
+            message_ids = [message_id]
     
-    if hasattr(response, 'message_ids') and response.message_ids:
-        message_ids = response.message_ids
-    elif hasattr(response, 'message_id') and response.message_id:
-        message_ids = [response.message_id]
-    else:
-        # Try to convert to dict
-        try:
-            response_dict = response.to_dict()
-            message_ids = response_dict.get('messageIds', [])
-        except:
-            # Last resort: generate placeholder IDs
-            logging.warning("[EMAIL_TOOL] Could not extract message IDs from response")
-            message_ids = [f"unknown_id_{i}_{int(time.time())}" for i in range(expected_count)]
+    if not message_ids:
+        # Last resort: generate placeholder IDs
+        logging.warning("[EMAIL_TOOL] Could not extract message IDs from response")
+        now = int(time.time())
+        message_ids = [f"unknown_id_{i}_{now}" for i in range(expected_count)]
     
     return message_ids
 
     
+def _get_events_for_one(msg_id: str, max_retries: int) -> List[Dict]:
+    """
+    Fetch the event history for a single message ID with retry logic (runs in a worker thread).
+    
+    Returns:
+        List of event dicts, or a list containing a single error event dict
+    """
+    for attempt in range(max_retries):
+        try:
+            # Rate limiting (shared across workers and with chunk sends)
+            _BREVO_BUCKET.acquire()
+            
+            # The API expects the full message_id, often including angle brackets
+            api_response = _get_api().get_email_event_report(message_id=msg_id)
+            
+            # Success - extract events
+            return [e.to_dict() for e in api_response.events] if api_response.events else []
+            
+        except ApiException as e:
+            is_retryable, err_msg, retry_after = _categorize_api_error(e)
+            
+            # If it's a permanent error (like 404), don't retry
+            if not is_retryable:
+                return [{'event': 'error', 'reason': err_msg}]
+            
+            # If retryable and not last attempt, continue
+            if attempt < max_retries - 1:
+                if retry_after is not None:
+                    delay = _retry_after_delay(retry_after)
+                else:
+                    delay = _compute_backoff_delay(attempt)
+                logging.warning(
+                    "[EMAIL_TOOL] Failed to get events for %s (attempt %d/%d). Retrying in %.2fs...",
+                    msg_id, attempt + 1, max_retries, delay
+                )
+                time.sleep(delay)
+            else:
+                # Last attempt failed
+                return [{'event': 'error', 'reason': err_msg}]
+                
+        except Exception as e:
+            if attempt < max_retries - 1:
+                delay = _compute_backoff_delay(attempt)
+                logging.warning(
+                    "[EMAIL_TOOL] Unexpected error for %s (attempt %d/%d): %s. Retrying in %.2fs...",
+                    msg_id, attempt + 1, max_retries, e, delay
+                )
+                time.sleep(delay)
+            else:
+                return [{'event': 'error', 'reason': str(e)}]
+    
+    return []
+
+
+# Brevo message IDs start with the send time, e.g. '<202310161234.12345678901@smtp-relay.mailin.fr>'
+_MESSAGE_ID_DATE_RE = re.compile(r'^<?(\d{8})')
+
+
+def _message_id_date(msg_id: str) -> Optional[datetime.date]:
+    """Return the send date embedded in a Brevo message ID, or None if it has none."""
+    match = _MESSAGE_ID_DATE_RE.match(msg_id)
+    if not match:
+        return None
+    try:
+        return datetime.datetime.strptime(match.group(1), '%Y%m%d').date()
+    except ValueError:
+        return None
+
+
+@retry_with_exponential_backoff(max_retries=MAX_RETRIES)
+def _get_event_report_page(start_date: str, end_date: str, offset: int):
+    """Fetch one page of the date-range event report (with retry)."""
+    _BREVO_BUCKET.acquire()
+    return _get_api().get_email_event_report(
+        start_date=start_date, end_date=end_date, limit=EVENTS_PAGE_LIMIT, offset=offset, sort='desc'
+    )
+
+
+def _fetch_events_bulk(start_date: datetime.date, end_date: datetime.date, message_id_set: set) -> Dict:
+    """
+    Fetch events in a date range page by page (newest first) and group them by message ID.
+    
+    A message's 'requests' event is its oldest, so once it has been seen every later event of
+    that message has been too. Paging stops as soon as that holds for all of message_id_set,
+    when the report runs out, or after EVENTS_BULK_MAX_PAGES pages.
+    
+    Args:
+        start_date: First day of the report (inclusive)
+        end_date: Last day of the report (inclusive)
+        message_id_set: Message IDs to keep; events for other messages are dropped
+    
+    Returns:
+        Dict mapping each message ID whose events are complete to its list of event dicts
+        (IDs left out, because the page cap was hit first, need a per-ID lookup)
+    
+    Raises:
+        ApiException: If a page still fails after all retries
+    """
+    results = {msg_id: [] for msg_id in message_id_set}
+    pending = set(message_id_set)  # IDs whose 'requests' event hasn't been reached yet
+    start, end = start_date.isoformat(), end_date.isoformat()
+    offset = 0
+    exhausted = False
+    
+    for page in range(1, EVENTS_BULK_MAX_PAGES + 1):
+        api_response = _get_event_report_page(start, end, offset)
+        events = api_response.events or []
+        for event in events:
+            if event.message_id in message_id_set:
+                results[event.message_id].append(event.to_dict())
+                if event.event == 'requests':
+                    pending.discard(event.message_id)
+        
+        if len(events) < EVENTS_PAGE_LIMIT:
+            exhausted = True
+            break
+        if not pending:
+            break
+        offset += EVENTS_PAGE_LIMIT
+    
+    if not exhausted:
+        for msg_id in pending:
+            del results[msg_id]
+    
+    logging.info(
+        "[EMAIL_TOOL] Fetched events for %d/%d messages in %d page(s)",
+        len(results), len(message_id_set), page
+    )
+    return results
+
+
 def get_email_events(message_ids: list, max_retries: int = 2):
     """
     Retrieves the event history for a list of message IDs from Brevo with retry logic.
+    More than EVENTS_BULK_THRESHOLD IDs are fetched with a paged date-range report (the
+    range is taken from the send dates embedded in the IDs, at most EVENTS_BULK_MAX_DAYS back);
+    smaller requests, older IDs, IDs without a date and IDs the report didn't finish are
+    fetched concurrently per ID under the shared API rate limit.
 
     Args:
         message_ids: A list of message ID strings (e.g., '<...-...@smtp-relay.mailin.fr>')
@@ -622,64 +1351,47 @@ def get_email_events(message_ids: list, max_retries: int = 2):
     if not message_ids:
         return {}
 
-    configuration = sib_api_v3_sdk.Configuration()
-    configuration.api_key['api-key'] = BREVO_API_KEY
-    api_instance = sib_api_v3_sdk.TransactionalEmailsApi(sib_api_v3_sdk.ApiClient(configuration))
-
     results = {}
+    valid_ids = []
     
     for msg_id in message_ids:
         # Validate message ID format
         if not isinstance(msg_id, str) or '@' not in msg_id:
             results[msg_id] = [{'event': 'error', 'reason': 'Invalid Message ID format'}]
-            continue
-
-        # Retry logic for each message ID
-        last_error = None
-        for attempt in range(max_retries):
+        elif msg_id not in results:
+            results[msg_id] = None  # Placeholder keeps input order
+            valid_ids.append(msg_id)
+    
+    if len(valid_ids) > EVENTS_BULK_THRESHOLD:
+        # Events (opens, clicks) keep arriving after the send date, so the report runs up to today;
+        # bound its span so old IDs don't pull in months of unrelated account events
+        today = datetime.date.today()
+        oldest_allowed = today - datetime.timedelta(days=EVENTS_BULK_MAX_DAYS)
+        dated_ids = {}
+        for msg_id in valid_ids:
+            sent_on = _message_id_date(msg_id)
+            if sent_on is not None and sent_on >= oldest_allowed:
+                dated_ids[msg_id] = sent_on
+        
+        if len(dated_ids) > EVENTS_BULK_THRESHOLD:
+            start_date = min(dated_ids.values())
+            end_date = max(today, max(dated_ids.values()))
             try:
-                # Rate limiting
-                time.sleep(RATE_LIMIT_DELAY)
-                
-                # The API expects the full message_id, often including angle brackets
-                api_response = api_instance.get_email_event_report(message_id=msg_id)
-                
-                # Success - extract events
-                results[msg_id] = [e.to_dict() for e in api_response.events] if api_response.events else []
-                break  # Success, exit retry loop
-                
+                fetched = _fetch_events_bulk(start_date, end_date, set(dated_ids))
+                results.update(fetched)
+                valid_ids = [msg_id for msg_id in valid_ids if msg_id not in fetched]
             except ApiException as e:
-                last_error = e
-                is_retryable, err_msg = _categorize_api_error(e)
-                
-                # If it's a permanent error (like 404), don't retry
-                if not is_retryable:
-                    results[msg_id] = [{'event': 'error', 'reason': err_msg}]
-                    break
-                
-                # If retryable and not last attempt, continue
-                if attempt < max_retries - 1:
-                    delay = min(INITIAL_RETRY_DELAY * (2 ** attempt), MAX_RETRY_DELAY)
-                    logging.warning(
-                        f"[EMAIL_TOOL] Failed to get events for {msg_id} (attempt {attempt + 1}/{max_retries}). "
-                        f"Retrying in {delay}s..."
-                    )
-                    time.sleep(delay)
-                else:
-                    # Last attempt failed
-                    results[msg_id] = [{'event': 'error', 'reason': err_msg}]
-                    
-            except Exception as e:
-                last_error = e
-                
-                if attempt < max_retries - 1:
-                    delay = min(INITIAL_RETRY_DELAY * (2 ** attempt), MAX_RETRY_DELAY)
-                    logging.warning(
-                        f"[EMAIL_TOOL] Unexpected error for {msg_id} (attempt {attempt + 1}/{max_retries}): {str(e)}. "
-                        f"Retrying in {delay}s..."
-                    )
-                    time.sleep(delay)
-                else:
-                    results[msg_id] = [{'event': 'error', 'reason': str(e)}]
+                _, err_msg, _ = _categorize_api_error(e)
+                logging.warning("[EMAIL_TOOL] Bulk event fetch failed, falling back to per-ID lookups: %s", err_msg)
+    
+    if valid_ids:
+        max_workers = min(EVENTS_MAX_WORKERS, len(valid_ids))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(_get_events_for_one, msg_id, max_retries): msg_id
+                for msg_id in valid_ids
+            }
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
 
     return results
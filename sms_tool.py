@@ -1,10 +1,215 @@
-from typing import List, Dict, Optional
-from android_sms_gateway import client, domain
+import atexit
+from collections import OrderedDict
+import operator
+import queue
+import random
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Dict, Mapping, Optional, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from android_sms_gateway import client, domain, http
 from config import ANDROID_SMS_GATEWAY_LOGIN as login, ANDROID_SMS_GATEWAY_PASSWORD as password
+from config import SMS_MAX_CONCURRENT_SENDS
+
+# Process-wide gateway client, created on first use so its pooled keep-alive
+# connections are shared by sends and status lookups; closed at interpreter exit
+_client: Optional[client.APIClient] = None
+_client_session: Optional[requests.Session] = None
+_client_lock = threading.Lock()
+
+# Retry policy for transient gateway errors (rate limiting and overloaded upstreams)
+RETRYABLE_STATUS_CODES = frozenset({429, 502, 503, 504})
+SEND_MAX_ATTEMPTS = 5
+RETRY_BASE_DELAY = 0.5  # seconds
+RETRY_MAX_DELAY = 30.0  # seconds
+
+EVENTS_MAX_WORKERS = 16  # Concurrent gateway state lookups
+MAX_RECIPIENTS_PER_MESSAGE = 100  # Phones per gateway message when recipients share the same text
+
+# Recent get_sms_event results, so repeated refresh clicks don't hit the gateway.
+# Final states never change and are kept until evicted; others expire after STATE_CACHE_TTL_SECONDS.
+STATE_CACHE_TTL_SECONDS = 10.0
+STATE_CACHE_MAX_ENTRIES = 10_000
+_FINAL_STATES = frozenset({"delivered", "failed"})
+_state_cache: "OrderedDict[str, Tuple[float, Dict[str, str]]]" = OrderedDict()
+_state_cache_lock = threading.Lock()
+
+# Gateway (and legacy) state names, lowercased, mapped to the states the UI knows
+_STATE_MAP: Dict[str, str] = {
+    "queued": "queued", "queue": "queued", "pending": "queued", "processed": "queued",
+    "sent": "sent",
+    "delivered": "delivered",
+    "failed": "failed", "error": "failed", "dead": "failed", "cancelling": "failed", "cancelled": "failed",
+}
+# Exact spellings the gateway sends (lowercase and the SDK's capitalized ProcessState values),
+# so the common case resolves with one dict probe and no strip()/lower() copies
+_FAST_STATE_MAP: Dict[str, str] = {
+    sys.intern(spelling): sys.intern(canonical)
+    for raw, canonical in _STATE_MAP.items()
+    for spelling in (raw, raw.capitalize(), raw.upper())
+}
+
+
+def _make_session() -> requests.Session:
+    """Creates a requests session whose pool can hold one connection per concurrent send."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, SMS_MAX_CONCURRENT_SENDS), max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _get_client() -> client.APIClient:
+    """Returns the shared APIClient backed by a pooled requests session, creating it on first use."""
+    global _client, _client_session
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                session = _make_session()
+                http_client = http.RequestsHttpClient(session)
+                try:
+                    c = client.APIClient(login, password, http=http_client)
+                except TypeError:
+                    # Older SDK versions don't accept an http client; attach it directly
+                    c = client.APIClient(login, password)
+                    c.http = http_client
+                _client_session, _client = session, c
+    return _client
+
+
+def _close_client():
+    """Closes the shared client's session; the next _get_client() call creates a new one."""
+    global _client, _client_session
+    with _client_lock:
+        if _client_session is not None:
+            _client_session.close()
+        _client = _client_session = None
+
+
+atexit.register(_close_client)
+
+
+def _error_status(error: Exception) -> Optional[int]:
+    """Returns the HTTP status of a gateway error (SDK APIError or requests HTTPError), if any."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    """Returns the Retry-After delay (in seconds) sent with the error response, if any."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        return max(0.0, float(headers.get("Retry-After")))
+    except (TypeError, ValueError):
+        return None
+
+
+class _AdaptiveLimiter:
+    """
+    AIMD concurrency limiter for gateway calls (additive increase, multiplicative decrease).
+    The allowed number of in-flight calls grows by INCREASE_STEP after each call that
+    finishes within target_latency, and is halved when the gateway signals congestion
+    (429/5xx). Calls that started before the last decrease don't trigger another one,
+    so a burst of errors from one window only halves the limit once.
+    """
+
+    INCREASE_STEP = 0.5
+    DECREASE_FACTOR = 0.5
+
+    def __init__(self, min_limit: int = 1, max_limit: int = 64, target_latency: float = 1.0):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.target_latency = target_latency
+        self.limit = float(max(self.min_limit, self.max_limit // 4))
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> float:
+        """Blocks until a call slot is free; returns the call's start time."""
+        with self._cond:
+            while self._in_flight >= int(self.limit):
+                self._cond.wait()
+            self._in_flight += 1
+            return time.monotonic()
+
+    def release(self, started: float, congested: bool):
+        """Frees the slot taken at `started` and adapts the limit to the call's outcome."""
+        now = time.monotonic()
+        with self._cond:
+            self._in_flight -= 1
+            if congested:
+                if started >= self._last_decrease:
+                    self.limit = max(self.min_limit, self.limit * self.DECREASE_FACTOR)
+                    self._last_decrease = now
+            elif now - started <= self.target_latency:
+                self.limit = min(self.max_limit, self.limit + self.INCREASE_STEP)
+            self._cond.notify_all()
+
+
+def _send_with_retry(c: client.APIClient, message: "domain.Message", max_attempts: int = SEND_MAX_ATTEMPTS,
+                     limiter: Optional[_AdaptiveLimiter] = None):
+    """
+    Sends a message, retrying 429/5xx responses with jittered exponential backoff.
+    A Retry-After header, when present, is used instead of the computed delay.
+    Other errors (and the last failed attempt) are raised to the caller.
+    If a limiter is given, each attempt holds one of its slots (not the backoff sleep).
+    """
+    for attempt in range(max_attempts):
+        started = limiter.acquire() if limiter else None
+        try:
+            state = c.send(message)
+        except Exception as e:
+            congested = _error_status(e) in RETRYABLE_STATUS_CODES
+            if limiter:
+                limiter.release(started, congested)
+            if not congested or attempt == max_attempts - 1:
+                raise
+            delay = _retry_after_seconds(e)
+            if delay is None:
+                delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempt)) + random.uniform(0, RETRY_BASE_DELAY)
+            time.sleep(min(delay, RETRY_MAX_DELAY))
+        else:
+            if limiter:
+                limiter.release(started, congested=False)
+            return state
+
+
+def _send_one(c: client.APIClient, phones: List[str], text: str,
+              limiter: Optional[_AdaptiveLimiter] = None) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Sends one gateway message with text to all phones (runs in a worker thread).
+    Errors are captured in the result rather than raised.
+
+    Returns:
+        (message_id, error) shared by every phone in the message.
+    """
+    try:
+        message = domain.Message(
+            text,
+            phones,
+            with_delivery_report=True
+        )
+        state = _send_with_retry(c, message, limiter=limiter)
+        return _ID_EXTRACTOR(state), None
+    except Exception as e:
+        return None, str(e)
+
 
 def send_bulk_sms(versions: List[Dict[str, str]]) -> List[Dict[str, str]]:
     """
     Sends multiple SMS messages using the Android SMS Gateway.
+    Recipients with identical text are grouped into multi-recipient gateway messages (up to
+    MAX_RECIPIENTS_PER_MESSAGE phones each). Messages are sent concurrently over the shared client;
+    an AIMD limiter adapts the number of in-flight sends (at most SMS_MAX_CONCURRENT_SENDS) to the
+    gateway's latency and 429/5xx responses.
 
     Args:
         versions: A list of dictionaries, where each dictionary contains:
@@ -12,36 +217,220 @@ def send_bulk_sms(versions: List[Dict[str, str]]) -> List[Dict[str, str]]:
             - "text": The SMS message content.
 
     Returns:
-        A list of dictionaries, each containing:
+        A list of dictionaries (in the same order as versions), each containing:
             - "recipient": The original recipient phone number.
-            - "message_id": The ID of the sent message if successful, otherwise None.
+            - "message_id": The ID of the sent message if successful, otherwise None
+                            (shared by recipients sent in the same gateway message).
             - "error": An error message if sending failed for that recipient, otherwise None.
     """
-    results = []
-    with client.APIClient(login, password) as c:
-        for version in versions:
-            recipient = version.get("recipient")
-            text = version.get("text")
+    if not versions:
+        return []
 
-            if not recipient or not text:
-                results.append({"recipient": recipient, "message_id": None, "error": "Missing recipient or text"})
-                continue
+    # Validate and normalize everything up front so the worker threads only do network I/O
+    prepped = []
+    for v in versions:
+        recipient, text = v.get("recipient"), v.get("text") or ""
+        phone = (recipient or "").strip()
+        prepped.append((recipient, phone, text, bool(phone and text.strip())))
+
+    # Group valid versions by text so each gateway message carries every phone sharing that text
+    groups: Dict[str, List[int]] = {}
+    for i, (_, _, text, ok) in enumerate(prepped):
+        if ok:
+            groups.setdefault(text, []).append(i)
+    batches = [
+        (text, indices[start:start + MAX_RECIPIENTS_PER_MESSAGE])
+        for text, indices in groups.items()
+        for start in range(0, len(indices), MAX_RECIPIENTS_PER_MESSAGE)
+    ]
+
+    # Preallocated and filled by index: invalid versions now, sent ones as their message completes
+    results: List[Optional[Dict[str, Optional[str]]]] = [None] * len(prepped)
+    for i, (recipient, _, _, ok) in enumerate(prepped):
+        if not ok:
+            results[i] = {"recipient": recipient, "message_id": None, "error": "Missing recipient or text"}
+
+    if batches:
+        c = _get_client()
+        limiter = _AdaptiveLimiter(max_limit=SMS_MAX_CONCURRENT_SENDS)
+        max_workers = max(1, min(SMS_MAX_CONCURRENT_SENDS, len(batches)))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            sent = executor.map(
+                lambda batch: _send_one(c, [prepped[i][1] for i in batch[1]], batch[0], limiter=limiter),
+                batches
+            )
+            for (_, indices), (message_id, error) in zip(batches, sent):
+                for i in indices:
+                    results[i] = {"recipient": prepped[i][0], "message_id": message_id, "error": error}
 
-            try:
-                message = domain.Message(
-                    text,
-                    [recipient],
-                    with_delivery_report=True
-                )
-                state = c.send(message)
-                results.append({"recipient": recipient, "message_id": state.id, "error": None})
-            except Exception as e:
-                results.append({"recipient": recipient, "message_id": None, "error": str(e)})
     return results
 
+
+def _build_extractor(names: tuple):
+    """
+    Returns a function that reads the first non-None of names from a dict (by key)
+    or a model object (by attribute, including __slots__ and properties).
+    """
+    getters = tuple(zip(names, map(operator.attrgetter, names)))
+
+    def extract(obj):
+        is_mapping = isinstance(obj, Mapping)
+        for name, getter in getters:
+            try:
+                value = obj[name] if is_mapping else getter(obj)
+            except (KeyError, AttributeError):
+                continue
+            if value is not None:
+                return value
+        return None
+
+    return extract
+
+
+# Attribute/key names used by the different gateway SDK versions, in order of preference
+_ID_EXTRACTOR = _build_extractor(("id", "message_id", "messageId"))
+_STATE_EXTRACTOR = _build_extractor(("state", "status"))
+_TIME_EXTRACTOR = _build_extractor(("updated_at", "updatedAt", "timestamp", "time"))
+_RECIPIENTS_EXTRACTOR = _build_extractor(("recipients",))
+_PHONE_EXTRACTOR = _build_extractor(("phone_number", "phoneNumber"))
+_ERROR_EXTRACTOR = _build_extractor(("error",))
+
+
+def _normalize_state(raw_state) -> str:
+    """Maps a gateway state (string or ProcessState enum) to queued/sent/delivered/failed/unknown."""
+    if raw_state is None:
+        return "unknown"
+    raw_state = getattr(raw_state, "value", raw_state)
+    if isinstance(raw_state, str):
+        hit = _FAST_STATE_MAP.get(raw_state)
+        if hit is not None:
+            return hit
+    return _STATE_MAP.get(str(raw_state or "").strip().lower(), "unknown")
+
+
+def _fetch_sms_event(message_id: str) -> Dict[str, str]:
+    """Fetches and normalizes one message's state from the gateway (uncached)."""
+    provider_state = _get_client().get_state(message_id)
+    updated_at = _TIME_EXTRACTOR(provider_state)
+    # A multi-recipient message has one state per phone; the message-level state alone can hide failures
+    recipients = [
+        {
+            "phone_number": _PHONE_EXTRACTOR(recipient),
+            "state": _normalize_state(_STATE_EXTRACTOR(recipient)),
+            "error": _ERROR_EXTRACTOR(recipient)
+        }
+        for recipient in _RECIPIENTS_EXTRACTOR(provider_state) or []
+    ]
+    return {
+        "message_id": _ID_EXTRACTOR(provider_state) or message_id,
+        "state": _normalize_state(_STATE_EXTRACTOR(provider_state)),
+        "updated_at": updated_at.isoformat() if hasattr(updated_at, "isoformat") else updated_at,
+        "recipients": recipients
+    }
+
+
+def _is_final(event: Dict) -> bool:
+    """True once the message and every one of its recipients reached delivered/failed."""
+    return event["state"] in _FINAL_STATES and all(r["state"] in _FINAL_STATES for r in event.get("recipients") or [])
+
+
+class _StateCoalescer:
+    """
+    Micro-batcher for state lookups, modeled on email_tool.BufferedSender.
+
+    Lookups submitted within max_wait_ms of the first pending one (up to max_batch)
+    are dispatched together: callers asking for the same message ID share one
+    gateway call, and distinct IDs are fetched in parallel. The gateway has no
+    batch state endpoint, so parallel per-ID calls are the batch.
+    """
+
+    def __init__(self, max_batch: int = 32, max_wait_ms: int = 20):
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=EVENTS_MAX_WORKERS, thread_name_prefix="SmsStateLookup")
+        self._thread = threading.Thread(target=self._run, name="SmsStateCoalescer", daemon=True)
+        self._thread.start()
+
+    def submit(self, message_id: str) -> Future:
+        """Queues a lookup; returns a Future resolving to the _fetch_sms_event() dict (or raising its error)."""
+        future = Future()
+        self._queue.put((message_id, future))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        waiting: Dict[str, List[Future]] = {}
+        for message_id, future in batch:
+            if future.set_running_or_notify_cancel():
+                waiting.setdefault(message_id, []).append(future)
+
+        for message_id, futures in waiting.items():
+            lookup = self._executor.submit(_fetch_sms_event, message_id)
+            lookup.add_done_callback(lambda done, futures=futures: self._resolve(done, futures))
+
+    @staticmethod
+    def _resolve(done: Future, futures: List[Future]):
+        error = done.exception()
+        for future in futures:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(dict(done.result()))
+
+
+_coalescer: Optional[_StateCoalescer] = None
+_coalescer_lock = threading.Lock()
+
+
+def _get_coalescer() -> _StateCoalescer:
+    """Returns the shared lookup coalescer, starting its thread on first use."""
+    global _coalescer
+    if _coalescer is None:
+        with _coalescer_lock:
+            if _coalescer is None:
+                _coalescer = _StateCoalescer()
+    return _coalescer
+
+
+def _cached_event(message_id: str) -> Optional[Dict[str, str]]:
+    """Returns a copy of the cached state for message_id if it is still fresh, else None."""
+    now = time.monotonic()
+    with _state_cache_lock:
+        cached_at, cached = _state_cache.get(message_id, (0.0, None))
+        if cached is not None and (_is_final(cached) or now - cached_at < STATE_CACHE_TTL_SECONDS):
+            _state_cache.move_to_end(message_id)
+            return dict(cached)
+    return None
+
+
+def _store_event(message_id: str, result: Dict[str, str]):
+    with _state_cache_lock:
+        _state_cache[message_id] = (time.monotonic(), dict(result))
+        _state_cache.move_to_end(message_id)
+        if len(_state_cache) > STATE_CACHE_MAX_ENTRIES:
+            _state_cache.popitem(last=False)
+
+
 def get_sms_event(message_id: str) -> Dict[str, str]:
     """
     Retrieves the status of a sent SMS message.
+    Results are cached: final states (the message and all its recipients delivered/failed) until evicted,
+    others for STATE_CACHE_TTL_SECONDS.
+    Uncached lookups go through a short (20 ms) coalescing window shared with concurrent callers.
 
     Args:
         message_id: The ID of the message to check.
@@ -49,13 +438,43 @@ def get_sms_event(message_id: str) -> Dict[str, str]:
     Returns:
         A dictionary containing the message status, typically with keys like:
             - "message_id": The ID of the message.
-            - "state": The current state of the message (e.g., "queued", "sent", "delivered", "failed").
+            - "state": The normalized state: "queued", "sent", "delivered", "failed" or "unknown".
             - "updated_at": Timestamp of the last status update.
+            - "recipients": One {"phone_number", "state", "error"} dict per phone in the message,
+                            with the same normalized states (empty if the gateway reports none).
     """
-    with client.APIClient(login, password) as c:
-        status = c.get_state(message_id)
-        return {
-            "message_id": status.id,
-            "state": status.state,
-            "updated_at": status.updated_at.isoformat() if status.updated_at else None
-        }
+    cached = _cached_event(message_id)
+    if cached is not None:
+        return cached
+
+    result = _get_coalescer().submit(message_id).result()
+    _store_event(message_id, result)
+    return result
+
+
+def get_sms_events(message_ids: List[str]) -> Dict[str, Dict[str, str]]:
+    """
+    Retrieves the status of several sent SMS messages.
+    Uncached IDs are submitted to the lookup coalescer together, so they are fetched
+    in parallel (up to EVENTS_MAX_WORKERS at a time) instead of one after another.
+
+    Args:
+        message_ids: The IDs of the messages to check.
+
+    Returns:
+        A dictionary mapping each message ID (in input order) to its get_sms_event() dict.
+        Failed lookups map to {"message_id", "state": "unknown", "updated_at": None, "recipients": [], "error"}.
+    """
+    unique_ids = list(dict.fromkeys(mid for mid in message_ids if mid))
+    results: Dict[str, Optional[Dict[str, str]]] = {mid: _cached_event(mid) for mid in unique_ids}
+
+    coalescer = _get_coalescer() if None in results.values() else None
+    pending = {mid: coalescer.submit(mid) for mid, cached in results.items() if cached is None}
+    for message_id, future in pending.items():
+        try:
+            result = future.result()
+            _store_event(message_id, result)
+        except Exception as e:
+            result = {"message_id": message_id, "state": "unknown", "updated_at": None, "recipients": [], "error": str(e)}
+        results[message_id] = result
+    return results
@@ -1,10 +1,8 @@
 import streamlit as st
-import pandas as pd
 import os
 import shutil
 import tempfile
 from streamlit_login import render_login_form
-from data_handler import load_contacts_from_excel # Assuming this exists
 from email_agent import SmartEmailAgent # Assuming this exists
 from email_tool import send_bulk_email_messages, get_email_events
 from config import SENDER_EMAIL, OPENAI_API_KEY, BREVO_API_KEY, AI_MESSENGER_MODE # Assuming these exist
@@ -766,10 +764,14 @@ def page_generate():
         
         logging.info(f"Processing uploaded file: {uploaded_file.name}")
         with tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx") as tmp_file:
-            shutil.copyfileobj(uploaded_file, tmp_file)
+            # 1 MiB chunks: far fewer read/write calls than the 16 KiB default on multi-MB workbooks
+            shutil.copyfileobj(uploaded_file, tmp_file, length=1024 * 1024)
+            tmp_file.flush() # Written out before the path is stored and re-read on later reruns
             st.session_state.uploaded_file_path = tmp_file.name # Store path for access
         
         st.session_state.uploaded_file_name = uploaded_file.name
+        # Imported on first upload: the data handler pulls in pandas (and its Excel readers)
+        from data_handler import load_contacts_from_excel
         contacts, issues = load_contacts_from_excel(st.session_state.uploaded_file_path)
         st.session_state.contacts = contacts
         st.session_state.contact_issues = issues
@@ -1,25 +1,61 @@
 # streamlit_login.py
-import streamlit as st
-import streamlit_authenticator as stauth
+import copy
+from functools import lru_cache
 
-def render_login_form():
+
+@lru_cache(maxsize=1)
+def _mutable_credentials():
     """
-    Renders the login form and handles authentication.
+    Converts st.secrets["credentials"] to plain dicts, once per process.
 
-    Returns:
-        bool: True if the user is authenticated, False otherwise.
+    Secrets don't change while the app runs; after editing secrets.toml without a
+    restart, call _mutable_credentials.cache_clear() to pick up the new users.
+    Callers must copy the result before handing it to stauth (see _get_login_config).
     """
-    # 1. Load credentials and cookie config from secrets
-    #    THE FIX IS HERE: Convert the secrets object to a mutable dict.
+    import streamlit as st
+
     credentials = dict(st.secrets.get('credentials', {}))
     if 'usernames' in credentials:
         credentials['usernames'] = {
             username: dict(user_data)
             for username, user_data in credentials['usernames'].items()
         }
-    cookie_config = st.secrets.get('cookie', {})
+    return credentials
+
+def _get_login_config(st):
+    """
+    Returns this session's (credentials, cookie_config), built on the first run only.
+
+    The credentials dict is kept per session rather than per process because
+    stauth.Authenticate mutates it (hashes plaintext passwords, tracks login
+    attempts); reusing it also means passwords are only hashed once per session.
+    Each session deep-copies the process-wide _mutable_credentials() snapshot, so
+    the secrets are walked once per process, not once per session.
+    """
+    if "_login_config" not in st.session_state:
+        credentials = copy.deepcopy(_mutable_credentials())
+        cookie_config = dict(st.secrets.get('cookie', {}))
+        st.session_state["_login_config"] = (credentials, cookie_config)
+    return st.session_state["_login_config"]
+
+def render_login_form():
+    """
+    Renders the login form and handles authentication.
+
+    Returns:
+        bool: True if the user is authenticated, False otherwise.
+    """
+    # Imported here so importing this module doesn't pull in Streamlit and
+    # streamlit_authenticator (bcrypt, PyYAML, ...) outside the UI path
+    import streamlit as st
+    import streamlit_authenticator as stauth
+
+    # 1. Load credentials and cookie config (converted from secrets once per session)
+    credentials, cookie_config = _get_login_config(st)
 
     # 2. Instantiate the authenticator
+    #    Rebuilt on every run: its cookie manager component must render each run
+    #    to pick up the browser's cookies, so the instance itself isn't cached.
     authenticator = stauth.Authenticate(
         credentials,
         cookie_config.get('name', 'some_cookie_name'),
@@ -1,570 +1,101 @@
 # translations.py
 
+import json
+import sys
+from contextvars import ContextVar
+from functools import lru_cache
+from pathlib import Path
+
 LANGUAGES = {
     "en": "English",
     "fr": "Français",
 }
 
-# This dictionary holds your translations.
-# The structure is: {language_code: {key: translation_string}}
-TRANSLATIONS = {
-    "en": {
-        "AI Email Assistant": "AI Email Assistant",
-        "Welcome to the AI Email Assistant!": "Welcome to the AI Email Assistant!",
-        "Select your language": "Select your language", # This is the hardcoded label, so it's fine
-        "Generate Email": "Generate Email",
-        "Compose your email details below.": "Compose your email details below.",
-        "Recipient": "Recipient",
-        "Subject": "Subject",
-        "Sender": "Sender",
-        "Clear Form": "Clear Form",
-        "Your email has been generated! You can modify it below.": "Your email has been generated! You can modify it below.",
-        "Error generating email. Please try again.": "Error generating email. Please try again.",
-        "Recipient, Subject, and Body cannot be empty.": "Recipient, Subject, and Body cannot be empty.",
-        "Enter a recipient": "Enter a recipient",
-        "Enter a subject": "Enter a subject",
-        "Enter email body": "Enter email body",
-        "Enter sender name or email": "Enter sender name or email",
-        # New Translations
-        "1. Generation": "1. Generation",
-        "2. Preview": "2. Preview",
-        "3. Results": "3. Results",
-        "Email sent successfully!": "Email sent successfully!",
-        "Back to Generation": "Back to Generation",
-        "Editable Email Content": "Editable Email Content",
-        "Live Preview for First Contact": "Live Preview for First Contact",
-        "Edit the email template here. Changes will reflect in the live preview.": "Edit the email template here. Changes will reflect in the live preview.",
-        "This shows how the email will appear for the first contact. To make changes, use the *Editable Email Content* section on the left.": "This shows how the email will appear for the first contact. To make changes, use the 'Editable Email Content' section on the left.",
-        "Add Attachments": "Add Attachments",
-        "Upload files": "Upload files",
-        "Current Attachments": "Current Attachments",
-        "Confirm Send": "Confirm Send",
-        "No contacts loaded to send emails to.": "No contacts loaded to send emails to.",
-        "Subject and Body cannot be empty. Please go back to Generation if needed.": "Subject and Body cannot be empty. Please go back to Generation if needed.",
-        "All emails sent successfully!": "All emails sent successfully!",
-        "All {count} emails were sent without any issues.": "All {count} emails were sent without any issues.",
-        "Sending complete with errors.": "Sending complete with errors.",
-        "Some emails failed to send. Please check the log below for details.": "Some emails failed to send. Please check the log below for details.",
-        "No emails were processed.": "No emails were processed.",
-        "Total Contacts Processed": "Total Contacts Processed",
-        "Emails Sent Successfully": "Emails Sent Successfully",
-        "Emails Failed to Send": "Emails Failed to Send",
-        "Show Activity Log and Errors": "Show Activity Log and Errors",
-        "Individual Email Status & Events": "Individual Email Status & Events",
-        "Message ID": "Message ID",
-        "Refresh Events for this Email": "Refresh Events for this Email",
-        "Events": "Events",
-        "No events found yet for this message. Click 'Refresh Events' to check.": "Aucun événement trouvé pour ce message. Cliquez sur 'Actualiser les événements' pour vérifier.",
-        "Fetching email delivery status...": "Récupération du statut de livraison de l'e-mail...",
-        "Activity Log": "Activity Log",
-        "Start New Email Session": "Start New Email Session",
-        "📊 View Dashboard": "📊 View Dashboard",
-        "AI Instruction: Describe the email you want to generate.": "AI Instruction: Describe the email you want to generate.",
-        "e.g., 'Draft a newsletter about our new product features.'": "e.g., 'Draft a newsletter about our new product features.'",
-        "Email Context (optional): Add style, tone, or specific details.": "Email Context (optional): Add style, tone, or specific details.",
-        "e.g., 'Friendly tone, include a call to action to visit our website.'": "e.g., 'Friendly tone, include a call to action to visit our website.'",
-        "Personalize emails?": "Personalize emails?",
-        "Generic Greeting (e.g., 'Dear Valued Customer')": "Generic Greeting (e.g., 'Dear Valued Customer')",
-        "Enter a generic greeting if not personalizing": "Enter a generic greeting if not personalizing",
-        "Add a Custom Button?": "Add a Custom Button?",
-        "Custom Button Text": "Custom Button Text",
-        "e.g., 'Learn More'": "e.g., 'Learn More'",
-        "Button URL": "Button URL",
-        "e.g., 'https://your-website.com'": "e.g., 'https://your-website.com'",
-        "Please provide instructions for the AI to generate the email.": "Please provide instructions for the AI to generate the email.",
-        "Successfully loaded {count} valid contacts.": "Successfully loaded {count} valid contacts.",
-        "WARNING: Some contacts had issues (e.g., missing/invalid/duplicate emails). They will be skipped.": "WARNING: Some contacts had issues (e.g., missing/invalid/duplicate emails). They will be skipped.",
-        "No valid contacts found in the Excel file.": "No valid contacts found in the Excel file.",
-        "Please upload an Excel file to get started.": "Please upload an Excel file to get started.",
-        "Sender Email": "Sender Email",
-        "Not configured": "Not configured",
-        "Sender email credentials are not configured. Please set SENDER_EMAIL and BREVO_API_KEY in Streamlit secrets.": "Sender email credentials are not configured. Please set SENDER_EMAIL and BREVO_API_KEY in Streamlit secrets.",
-        "Upload Excel (.xlsx/.xls)": "Upload Excel (.xlsx/.xls)",
-        "Attachments selected: {count}": "Attachments selected: {count}",
-        "Donate Button Text": "Donate Now",
-        "Donate Button URL": "https://www.migdal-france.org/MIGDAL-FRANCE_WEB/FR/PAIEMENT_STRIPE/DONS-PAIEMENT-CB.awp",
-        "Valued Customer": "Valued Customer", # New fallback generic greeting
-        "Language": "Language", # For the sidebar selectbox label
-        "Dear": "Dear", # Added for dynamic salutation prefix
-        "Characters: {n}": "Characters: {n}",
-        "Tax Refund Text": "Your donation is eligible for a 66% tax refund.",
-        "Association Info": "Migdal France | 1 rue de la Paix, 75002 Paris | contact@migdal-france.org",
-        "Unsubscribe Text": "To unsubscribe from our mailing list, please click here.",
-        "Row {row_num}: Invalid or missing email for '{name}' (Email: '{email}').": "Row {row_num}: Invalid or missing email for '{name}' (Email: '{email}').",
-        "Email Buttons Configuration": "Email Buttons Configuration",
-        "Text Before Button": "Text Before Button",
-        "e.g. 'click the button below to learn more'": "e.g. 'click the button below to learn more'",
-        "Button Color": "Button Color",
-        "Preview Color": "Preview Color",
-        "Bulk send completed successfully!": "Bulk send completed successfully!",
-        "Total emails sent: {count}": "Total emails sent: {count}",
-        "Success rate: {success}/{total} ({percentage:.1f}%)": "Success rate: {success}/{total} ({percentage:.1f}%)",
-        "Preparing and sending emails... This may take several minutes for large lists.": "Preparing and sending emails... This may take several minutes for large lists.",
-        "Generation & Setup": "Generation & Setup",
-        "Preview & Send": "Preview & Send",
-        "Results": "Results",
-        # Email Status Page
-        "Email Status Dashboard": "Email Status Dashboard",
-        "View latest email activity from Brevo. Data is fetched live on each refresh.": "View latest email activity from Brevo. Data is fetched live on each refresh.",
-        "Brevo API key not found in secrets. Please configure it in .streamlit/secrets.toml": "Brevo API key not found in secrets. Please configure it in .streamlit/secrets.toml",
-        "Error reading secrets: ": "Error reading secrets: ",
-        "Filters": "Filters",
-        "Time Range": "Time Range",
-        "Results per page": "Results per page",
-        "Event Type": "Event Type",
-        "Search by Email": "Search by Email",
-        "Test Connection": "Test Connection",
-        "Testing connection...": "Testing connection...",
-        "🔄 Refresh Data": "🔄 Refresh Data",
-        "Fetching email events from Brevo...": "Fetching email events from Brevo...",
-        "Summary": "Summary",
-        "Total Events": "Total Events",
-        "Delivered": "Delivered",
-        "Opened": "Opened",
-        "Clicked": "Clicked",
-        "📊 Event Type Breakdown": "📊 Event Type Breakdown",
-        "Count": "Count",
-        "Email Events": "Email Events",
-        "Showing {start}-{end} of {total} events": "Showing {start}-{end} of {total} events",
-        "Time": "Time",
-        "Event": "Event",
-        "Tag": "Tag",
-        "View Details": "View Details",
-        "Template ID": "Template ID",
-        "Reason": "Reason",
-        "Link": "Link",
-        "Previous": "Previous",
-        "Page": "Page",
-        "Next": "Next",
-        "No email events found for the selected time range and filters.": "No email events found for the selected time range and filters.",
-        "Try adjusting your filters or time range.": "Try adjusting your filters or time range.",
-        "Error fetching email events: ": "Error fetching email events: ",
-        "Debug Information": "Debug Information",
-        "Data fetched live from Brevo": "Data fetched live from Brevo",
-        "Last updated": "Last updated",
-        "Start Date": "Start Date",
-        "End Date": "End Date",
-        # Email Status Page - Additional translations
-        "❌ Brevo API key not found in configuration": "❌ Brevo API key not found in configuration",
-        "Please configure your Brevo API key to use this feature.": "Please configure your Brevo API key to use this feature.",
-        "📖 How to configure": "📖 How to configure",
-        "⚠️ API key format looks unusual. Brevo API keys typically start with 'xkeysib-'": "⚠️ API key format looks unusual. Brevo API keys typically start with 'xkeysib-'",
-        "❌ Failed to initialize Brevo client: ": "❌ Failed to initialize Brevo client: ",
-        "📊 Campaign Dashboard": "📊 Campaign Dashboard",
-        "👈 Select a campaign from the sidebar to view details": "👈 Select a campaign from the sidebar to view details",
-        "Sent": "Sent",
-        "Failed": "Failed",
-        "Read": "Read",
-        "of delivered": "of delivered",
-        "📋 Activity Log": "📋 Activity Log",
-        "ℹ️ Understanding email tracking": "ℹ️ Understanding email tracking",
-        "🔍 Show debug info": "🔍 Show debug info",
-        "Recipient": "Recipient",
-        "Delivery Status": "Delivery Status",
-        "Timestamp": "Timestamp",
-        "Clicked Links": "Clicked Links",
-        "❌ Failed": "❌ Failed",
-        "🎯 Engaged (Opened & Clicked)": "🎯 Engaged (Opened & Clicked)",
-        "🔗 Clicked (without open tracking)": "🔗 Clicked (without open tracking)",
-        "📖 Opened": "📖 Opened",
-        "✅ Delivered": "✅ Delivered",
-        "⚠️ Delayed": "⚠️ Delayed",
-        "⏳ Pending": "⏳ Pending",
-        "Delivered Count": "Delivered Count",
-        "Opened Count": "Opened Count",
-        "Clicks Count": "Clicks Count",
-        "Hard Bounces": "Hard Bounces",
-        "Soft Bounces": "Soft Bounces",
-        "Deferred": "Deferred",
-        "Status Priority": "Status Priority",
-        "Rate limit exceeded. Please wait a moment and try again.": "Rate limit exceeded. Please wait a moment and try again.",
-        "Brevo API has rate limits. The system will automatically retry with exponential backoff.": "Brevo API has rate limits. The system will automatically retry with exponential backoff.",
-        "Authentication error. Please check your Brevo API key.": "Authentication error. Please check your Brevo API key.",
-        "Your API key may be invalid or may not have the required permissions.": "Your API key may be invalid or may not have the required permissions.",
-        "Resource not found. The requested data may not exist.": "Resource not found. The requested data may not exist.",
-        "Request timed out. Please try again.": "Request timed out. Please try again.",
-        "🔍 Debug Information": "🔍 Debug Information",
-        "Error Type:": "Error Type:",
-        "Possible Solutions:": "Possible Solutions:",
-        "Email": "Email",
-        "Unsubscribed": "Unsubscribed",
-        "Error": "Error",
-        "Spam": "Spam",
-        # View Options & Filters
-        "⚙️ View Options & Filters": "⚙️ View Options & Filters",
-        "Exclude test emails or filter to specific campaigns. This does not delete any data.": "Exclude test emails or filter to specific campaigns. This does not delete any data.",
-        "Exclusion Filter": "Exclusion Filter",
-        "Exclude items containing:": "Exclude items containing:",
-        "e.g., @mycompany.com, test@example.com, [TEST]": "e.g., @mycompany.com, test@example.com, [TEST]",
-        "Enter comma-separated email addresses, domains, or subject keywords to exclude.": "Enter comma-separated email addresses, domains, or subject keywords to exclude.",
-        "Inclusion Filter": "Inclusion Filter",
-        "Include only items containing:": "Include only items containing:",
-        "e.g., [PROD], newsletter, @client.com": "e.g., [PROD], newsletter, @client.com",
-        "Enter comma-separated email addresses, domains, or subject keywords. Only matching items will be shown.": "Enter comma-separated email addresses, domains, or subject keywords. Only matching items will be shown.",
-        "Apply Filters": "Apply Filters",
-        "Clear Filters": "Clear Filters",
-        "Excluded: {count}": "Excluded: {count}",
-        "Filtered by inclusion: {count}": "Filtered by inclusion: {count}",
-        "Last 24 hours": "Last 24 hours",
-        "Last hour": "Last hour",
-        "Last 48 hours": "Last 48 hours",
-        "Last 7 days": "Last 7 days",
-        "Last 3 months": "Last 3 months",
-        "Generate & Send Emails": "Generate & Send Emails",
-        "🔄": "🔄",
-        "🔄 Refresh": "🔄 Refresh",
-        # Email tracking explanation
-        "How email tracking works:": "How email tracking works:",
-        "Delivered: Email successfully reached the recipient's inbox": "Delivered: Email successfully reached the recipient's inbox",
-        "Read (Opened): Recipient opened the email and loaded images (tracking pixel)": "Read (Opened): Recipient opened the email and loaded images (tracking pixel)",
-        "Clicked: Recipient clicked a link in the email": "Clicked: Recipient clicked a link in the email",
-        "Why you might see \"Clicked\" without \"Read\":": "Why you might see \"Clicked\" without \"Read\":",
-        "Recipient has images disabled/blocked in their email client": "Recipient has images disabled/blocked in their email client",
-        "Recipient clicked a link from email preview without fully opening": "Recipient clicked a link from email preview without fully opening",
-        "Some email clients block tracking pixels but allow link clicks": "Some email clients block tracking pixels but allow link clicks",
-        "This is normal and indicates engagement even without open tracking!": "This is normal and indicates engagement even without open tracking!",
-        # Email Status Explanations - Extended
-        "Email Delivery Statuses:": "Email Delivery Statuses:",
-        "Permanent failure - email address doesn't exist, domain is invalid, or unreachable": "Permanent failure - email address doesn't exist, domain is invalid, or unreachable",
-        "Temporary issues (mailbox full, server busy), blocked by server, or other errors": "Temporary issues (mailbox full, server busy), blocked by server, or other errors",
-        "Deferred - email is still being retried by the server": "Deferred - email is still being retried by the server",
-        "Email successfully reached the recipient's inbox": "Email successfully reached the recipient's inbox",
-        "Recipient opened the email and loaded images (tracking pixel)": "Recipient opened the email and loaded images (tracking pixel)",
-        "Recipient clicked a link in the email": "Recipient clicked a link in the email",
-        "Recipient both opened and clicked links": "Recipient both opened and clicked links",
-        "No delivery status received yet from Brevo": "No delivery status received yet from Brevo",
-        "Understanding Bounces:": "Understanding Bounces:",
-        "Hard Bounce → Invalid": "Hard Bounce → Invalid",
-        "The email address is permanently invalid. Brevo marks these automatically.": "The email address is permanently invalid. Brevo marks these automatically.",
-        "Soft Bounce → Invalid (Smart Detection)": "Soft Bounce → Invalid (Smart Detection)",
-        "Reasons like 'connection timeout', 'domain not found', 'no mail server' indicate the email is actually invalid.": "Reasons like 'connection timeout', 'domain not found', 'no mail server' indicate the email is actually invalid.",
-        "Soft Bounce → Failed": "Soft Bounce → Failed",
-        "Temporary issues - mailbox full, server temporarily down, message too large, etc. May succeed if retried later.": "Temporary issues - mailbox full, server temporarily down, message too large, etc. May succeed if retried later.",
-        "Blocked → Failed": "Blocked → Failed",
-        "Recipient's server blocked the email due to spam filters or policy rules.": "Recipient's server blocked the email due to spam filters or policy rules.",
-        "Smart Invalid Detection:": "Smart Invalid Detection:",
-        "The system automatically identifies invalid emails by checking:": "The system automatically identifies invalid emails by checking:",
-        "Hard bounces from Brevo (always invalid)": "Hard bounces from Brevo (always invalid)",
-        "Soft bounces with reasons indicating permanent failures:": "Soft bounces with reasons indicating permanent failures:",
-        "Connection timeout (domain unreachable)": "Connection timeout (domain unreachable)",
-        "Domain not found": "Domain not found",
-        "No mail server for domain": "No mail server for domain",
-        "Invalid/unknown recipient": "Invalid/unknown recipient",
-        "Enable debug mode below the table to see detailed bounce reasons from Brevo.": "Enable debug mode below the table to see detailed bounce reasons from Brevo.",
-        "Clicked Links Icons:": "Clicked Links Icons:",
-        "Unsubscribe link clicked": "Unsubscribe link clicked",
-        "Donation/payment link clicked": "Donation/payment link clicked",
-        "Multiple icons show when recipient clicked multiple links (e.g., 🔕 💝 means both unsubscribe and donate were clicked)": "Multiple icons show when recipient clicked multiple links (e.g., 🔕 💝 means both unsubscribe and donate were clicked)",
-        "🚫 Invalid Email": "🚫 Invalid Email",
-        "Invalid Email": "Invalid Email",
-        "Bounce Reason": "Bounce Reason"
-    },
-    "fr": {
-        "AI Email Assistant": "Assistant Courriel IA",
-        "Welcome to the AI Email Assistant!": "Bienvenue dans l'Assistant Courriel IA!",
-        "Select your language": "Sélectionnez votre langue",
-        "Generate Email": "Générer le Courriel",
-        "Compose your email details below.": "Composez les détails de votre courriel ci-dessous.",
-        "Recipient": "Destinataire",
-        "Subject": "Sujet",
-        "Sender": "Expéditeur",
-        "Clear Form": "Effacer le formulaire",
-        "Your email has been generated! You can modify it below.": "Votre courriel a été généré! Vous pouvez le modifier ci-dessous.",
-        "Error generating email. Please try again.": "Erreur lors de la génération du courriel. Veuillez réessayer.",
-        "Recipient, Subject, and Body cannot be empty.": "Le destinataire, le sujet et le corps ne peuvent pas être vides.",
-        "Enter a recipient": "Entrez un destinataire",
-        "Enter a subject": "Entrez un sujet",
-        "Enter email body": "Entrez le corps du courriel",
-        "Enter sender name or email": "Entrez le nom ou l'adresse email de l'expéditeur",
-        # New Translations
-        "1. Generation": "1. Génération",
-        "2. Preview": "2. Prévisualisation",
-        "3. Results": "3. Résultats",
-        "Email sent successfully!": "Courriel envoyé avec succès!",
-        "Back to Generation": "Retour à la Génération",
-        "Editable Email Content": "Contenu du Courriel Modifiable",
-        "Live Preview for First Contact": "Prévisualisation en Direct pour le Premier Contact",
-        "Edit the email template here. Changes will reflect in the live preview.": "Modifiez le modèle d'e-mail ici. Les modifications se refléteront dans l'aperçu en direct.",
-        "This shows how the email will appear for the first contact. To make changes, use the *Editable Email Content* section on the left.": "Ceci montre l'apparence de l'e-mail pour le premier contact. Pour apporter des modifications, utilisez la section 'Contenu de l'e-mail modifiable' sur la gauche.",
-        "Add Attachments": "Ajouter des Pièces Jointes",
-        "Upload files": "Télécharger des fichiers",
-        "Current Attachments": "Pièces Jointes Actuelles",
-        "Confirm Send": "Confirmer l'envoi",
-        "No contacts loaded to send emails to.": "Aucun contact chargé pour envoyer des courriels.",
-        "Subject and Body cannot be empty. Please go back to Generation if necessary.": "Le sujet et le corps ne peuvent pas être vides. Veuillez retourner à la Génération si nécessaire.",
-        "All emails sent successfully!": "Tous les courriels ont été envoyés avec succès!",
-        "All {count} emails were sent without any issues.": "Les {count} courriels ont tous été envoyés sans problème.",
-        "Sending complete with errors.": "Envoi terminé avec des erreurs.",
-        "Some emails failed to send. Please check the log below for details.": "Certains courriels n'ont pas pu être envoyés. Veuillez vérifier le journal ci-dessous pour plus de détails.",
-        "No emails were processed.": "Aucun courriel n'a été traité.",
-        "Total Contacts Processed": "Nombre total de contacts traités",
-        "Emails Sent Successfully": "Courriels envoyés avec succès",
-        "Emails Failed to Send": "Courriels non envoyés",
-        "Show Activity Log and Errors": "Afficher le journal d'activité et les erreurs",
-        "Individual Email Status & Events": "Statut et événements des courriels individuels",
-        "Message ID": "ID du message",
-        "Refresh Events for this Email": "Actualiser les événements pour ce courriel",
-        "Events": "Événements",
-        "No events found yet for this message. Click 'Refresh Events' to check.": "Aucun événement trouvé pour ce message. Cliquez sur 'Actualiser les événements' pour vérifier.",
-        "Fetching email delivery status...": "Récupération du statut de livraison de l'e-mail...",
-        "Activity Log": "Journal d'activité",
-        "Start New Email Session": "Démarrer une nouvelle session de courriel",
-        "📊 View Dashboard": "📊 Voir le tableau de bord",
-        "AI Instruction: Describe the email you want to generate.": "Instruction IA : Décrivez le courriel que vous souhaitez générer.",
-        "e.g., 'Draft a newsletter about our new product features.'": "ex. : 'Rédigez une newsletter sur nos nouvelles fonctionnalités de produit.'",
-        "Email Context (optional): Add style, tone, or specific details.": "Contexte du courriel (facultatif) : Ajoutez un style, un ton ou des détails spécifiques.",
-        "e.g., 'Friendly tone, include a call to action to visit our website.'": "ex. : 'Ton amical, incluez un appel à l'action pour visiter notre site web.'",
-        "Personalize emails?": "Personnaliser les courriels?",
-        "Generic Greeting (e.g., 'Dear Valued Customer')": "Salutation Générique (ex. : 'Cher client')",
-        "Enter a generic greeting if not personalizing": "Entrez une salutation générique si vous ne personnalisez pas",
-        "Add a Custom Button?": "Ajouter un Bouton Personnalisé?",
-        "Custom Button Text": "Texte du Bouton Personnalisé",
-        "e.g., 'Learn More'": "ex. : 'En savoir plus'",
-        "Button URL": "URL du Bouton",
-        "e.g., 'https://your-website.com'": "ex. : 'https://votre-site-web.com'",
-        "Please provide instructions for the AI to generate the email.": "Veuillez fournir des instructions à l'IA pour générer le courriel.",
-        "Successfully loaded {count} valid contacts.": "{count} contacts valides ont été chargés avec succès.",
-        "WARNING: Some contacts had issues (e.g., missing/invalid/duplicate emails). They will be skipped.": "AVERTISSEMENT : Certains contacts présentaient des problèmes (ex. : emails manquants/invalides/dupliqués). Ils seront ignorés.",
-        "No valid contacts found in the Excel file.": "Aucun contact valide n'a été trouvé dans le fichier Excel.",
-        "Please upload an Excel file to get started.": "Veuillez télécharger un fichier Excel pour commencer.",
-        "Sender Email": "Courriel de l'expéditeur",
-        "Not configured": "Non configuré",
-        "Sender email credentials are not configured. Please set SENDER_EMAIL and BREVO_API_KEY in Streamlit secrets.": "Les informations d'identification de l'expéditeur ne sont pas configurées. Veuillez définir SENDER_EMAIL et BREVO_API_KEY dans les secrets de Streamlit.",
-        "Upload Excel (.xlsx/.xls)": "Télécharger un fichier Excel (.xlsx/.xls)",
-        "Attachments selected: {count}": "{count} pièces jointes sélectionnées",
-        "Donate Button Text": "Faire un don",
-        "Donate Button URL": "https://www.migdal-france.org/MIGDAL-FRANCE_WEB/FR/PAIEMENT_STRIPE/DONS-PAIEMENT-CB.awp",
-        "Valued Customer": "Cher Client",
-        "Language": "Langue",
-        "Dear": "Cher", # Added for dynamic salutation prefix (translated to Cher for French)
-        "Characters: {n}": "Caractères : {n}",
-        "Tax Refund Text": "Votre don est éligible à une déduction fiscale de 66%.",
-        "Association Info": "Migdal France | 1 rue de la Paix, 75002 Paris | contact@migdal-france.org",
-        "Unsubscribe Text": "Pour vous désinscrire de notre liste de diffusion, veuillez cliquer ici.",
-        "Row {row_num}: Invalid or missing email for '{name}' (Email: '{email}').": "Ligne {row_num} : Email invalide ou manquant pour '{name}' (Email : '{email}').",
-        "Email Buttons Configuration": "Configuration des boutons d'e-mail",
-        "Text Before Button": "Texte avant le bouton",
-        "e.g. 'click the button below to learn more'": "ex. : 'cliquez sur le bouton ci-dessous pour en savoir plus'",
-        "Button Color": "Couleur du bouton",
-        "Preview Color": "Couleur de l'aperçu",
-        "Bulk send completed successfully!": "Envoi groupé terminé avec succès !",
-        "Total emails sent: {count}": "Nombre total d'e-mails envoyés : {count}",
-        "Success rate: {success}/{total} ({percentage:.1f}%)": "Taux de réussite : {success}/{total} ({percentage:.1f}%)",
-        "Preparing and sending emails... This may take several minutes for large lists.": "Préparation et envoi des e-mails... Cela peut prendre plusieurs minutes pour les grandes listes.",
-        "Generation & Setup": "Génération et configuration",
-        "Preview & Send": "Aperçu et envoi",
-        "Results": "Résultats",
-        "Generating email with AI. This may take a few moments...": "Génération d'email avec l'IA. Cela peut prendre quelques instants...",
-        # Email Status Page
-        "Email Status Dashboard": "Tableau de bord du statut des e-mails",
-        "View latest email activity from Brevo. Data is fetched live on each refresh.": "Voir la dernière activité d'e-mail de Brevo. Les données sont récupérées en direct à chaque actualisation.",
-        "Brevo API key not found in secrets. Please configure it in .streamlit/secrets.toml": "Clé API Brevo introuvable dans les secrets. Veuillez la configurer dans .streamlit/secrets.toml",
-        "Error reading secrets: ": "Erreur lors de la lecture des secrets : ",
-        "Filters": "Filtres",
-        "Time Range": "Plage temporelle",
-        "Results per page": "Résultats par page",
-        "Event Type": "Type d'événement",
-        "Search by Email": "Rechercher par e-mail",
-        "Test Connection": "Tester la connexion",
-        "Testing connection...": "Test de la connexion...",
-        "🔄 Refresh Data": "🔄 Actualiser les données",
-        "Fetching email events from Brevo...": "Récupération des événements d'e-mail depuis Brevo...",
-        "Summary": "Résumé",
-        "Total Events": "Événements totaux",
-        "Delivered": "Délivrés",
-        "Opened": "Ouverts",
-        "Clicked": "Cliqués",
-        "📊 Event Type Breakdown": "📊 Répartition par type d'événement",
-        "Count": "Nombre",
-        "Email Events": "Événements d'e-mail",
-        "Showing {start}-{end} of {total} events": "Affichage de {start}-{end} sur {total} événements",
-        "Time": "Heure",
-        "Event": "Événement",
-        "Tag": "Étiquette",
-        "View Details": "Voir les détails",
-        "Template ID": "ID du modèle",
-        "Reason": "Raison",
-        "Link": "Lien",
-        "Previous": "Précédent",
-        "Page": "Page",
-        "Next": "Suivant",
-        "No email events found for the selected time range and filters.": "Aucun événement d'e-mail trouvé pour la plage temporelle et les filtres sélectionnés.",
-        "Try adjusting your filters or time range.": "Essayez d'ajuster vos filtres ou votre plage temporelle.",
-        "Error fetching email events: ": "Erreur lors de la récupération des événements d'e-mail : ",
-        "Debug Information": "Informations de débogage",
-        "Data fetched live from Brevo": "Données récupérées en direct depuis Brevo",
-        "Last updated": "Dernière mise à jour",
-        "Start Date": "Date de début",
-        "End Date": "Date de fin",
-        "Total Recipients": "Total destinataires",
-        "Bounced": "Rejetés",
-        "📊 Detailed View": "📊 Vue détaillée",
-        "📥 Download Report": "📥 Télécharger le rapport",
-        "Email Delivery Status": "Statut de livraison des e-mails",
-        "One row per recipient with event counters": "Une ligne par destinataire avec compteurs d'événements",
-        "Failed": "Échec",
-        "Delayed": "Retardé",
-        "Pending": "En attente",
-        "💡 Tip: Click column headers to sort": "💡 Astuce: Cliquez sur les en-têtes de colonnes pour trier",
-        "Download Report": "Télécharger le rapport",
-        "Export the current email status data": "Exporter les données de statut d'e-mail actuelles",
-        "📥 Download as CSV": "📥 Télécharger en CSV",
-        "Preview": "Aperçu",
-        "Showing first 10 rows of {total} total": "Affichage des 10 premières lignes sur {total} au total",
-        "Delivered Count": "Nombre de livraisons",
-        "Opened Count": "Nombre d'ouvertures",
-        "Clicked Count": "Nombre de clics",
-        "Hard Bounce": "Rebond dur",
-        "Soft Bounce": "Rebond temporaire",
-        "Blocked": "Bloqué",
-        "Spam": "Spam",
-        "Last Event": "Dernier événement",
-        "Last Event Date": "Date du dernier événement",
-        # Email Status Page - Additional translations
-        "❌ Brevo API key not found in configuration": "❌ Clé API Brevo introuvable dans la configuration",
-        "Please configure your Brevo API key to use this feature.": "Veuillez configurer votre clé API Brevo pour utiliser cette fonctionnalité.",
-        "📖 How to configure": "📖 Comment configurer",
-        "⚠️ API key format looks unusual. Brevo API keys typically start with 'xkeysib-'": "⚠️ Le format de la clé API semble inhabituel. Les clés API Brevo commencent généralement par 'xkeysib-'",
-        "❌ Failed to initialize Brevo client: ": "❌ Échec de l'initialisation du client Brevo : ",
-        "📊 Campaign Dashboard": "📊 Tableau de bord des campagnes",
-        "👈 Select a campaign from the sidebar to view details": "👈 Sélectionnez une campagne dans la barre latérale pour voir les détails",
-        "Sent": "Envoyés",
-        "Failed": "Échec",
-        "Read": "Lus",
-        "of delivered": "des livrés",
-        "📋 Activity Log": "📋 Journal d'activité",
-        "ℹ️ Understanding email tracking": "ℹ️ Comprendre le suivi des e-mails",
-        "🔍 Show debug info": "🔍 Afficher les informations de débogage",
-        "Recipient": "Destinataire",
-        "Delivery Status": "Statut de livraison",
-        "Timestamp": "Horodatage",
-        "Clicked Links": "Liens cliqués",
-        "❌ Failed": "❌ Échec",
-        "🎯 Engaged (Opened & Clicked)": "🎯 Engagé (Ouvert et Cliqué)",
-        "🔗 Clicked (without open tracking)": "🔗 Cliqué (sans suivi d'ouverture)",
-        "📖 Opened": "📖 Ouvert",
-        "✅ Delivered": "✅ Délivré",
-        "⚠️ Delayed": "⚠️ Retardé",
-        "⏳ Pending": "⏳ En attente",
-        "Delivered Count": "Nombre de livraisons",
-        "Opened Count": "Nombre d'ouvertures",
-        "Clicks Count": "Nombre de clics",
-        "Hard Bounces": "Rebonds durs",
-        "Soft Bounces": "Rebonds temporaires",
-        "Deferred": "Différés",
-        "Status Priority": "Priorité du statut",
-        "Rate limit exceeded. Please wait a moment and try again.": "Limite de taux dépassée. Veuillez patienter un instant et réessayer.",
-        "Brevo API has rate limits. The system will automatically retry with exponential backoff.": "L'API Brevo a des limites de taux. Le système réessaiera automatiquement avec un délai exponentiel.",
-        "Authentication error. Please check your Brevo API key.": "Erreur d'authentification. Veuillez vérifier votre clé API Brevo.",
-        "Your API key may be invalid or may not have the required permissions.": "Votre clé API peut être invalide ou ne pas avoir les permissions requises.",
-        "Resource not found. The requested data may not exist.": "Ressource introuvable. Les données demandées peuvent ne pas exister.",
-        "Request timed out. Please try again.": "Délai d'attente de la requête dépassé. Veuillez réessayer.",
-        "🔍 Debug Information": "🔍 Informations de débogage",
-        "Error Type:": "Type d'erreur :",
-        "Possible Solutions:": "Solutions possibles :",
-        "Email": "E-mail",
-        "Unsubscribed": "Désabonné",
-        "Error": "Erreur",
-        "Spam": "Spam",
-        # View Options & Filters
-        "⚙️ View Options & Filters": "⚙️ Options d'affichage et filtres",
-        "Exclude test emails or filter to specific campaigns. This does not delete any data.": "Excluez les e-mails de test ou filtrez des campagnes spécifiques. Cela ne supprime aucune donnée.",
-        "Exclusion Filter": "Filtre d'exclusion",
-        "Exclude items containing:": "Exclure les éléments contenant :",
-        "e.g., @mycompany.com, test@example.com, [TEST]": "ex. : @monentreprise.com, test@exemple.com, [TEST]",
-        "Enter comma-separated email addresses, domains, or subject keywords to exclude.": "Entrez des adresses e-mail, des domaines ou des mots-clés de sujet séparés par des virgules à exclure.",
-        "Inclusion Filter": "Filtre d'inclusion",
-        "Include only items containing:": "Inclure uniquement les éléments contenant :",
-        "e.g., [PROD], newsletter, @client.com": "ex. : [PROD], newsletter, @client.com",
-        "Enter comma-separated email addresses, domains, or subject keywords. Only matching items will be shown.": "Entrez des adresses e-mail, des domaines ou des mots-clés de sujet séparés par des virgules. Seuls les éléments correspondants seront affichés.",
-        "Apply Filters": "Appliquer les filtres",
-        "Clear Filters": "Effacer les filtres",
-        "Excluded: {count}": "Exclus : {count}",
-        "Filtered by inclusion: {count}": "Filtrés par inclusion : {count}",
-        "Last 24 hours": "Dernières 24 heures",
-        "Last hour": "Dernière heure",
-        "Last 48 hours": "Dernières 48 heures",
-        "Last 7 days": "7 derniers jours",
-        "Last 3 months": "3 derniers mois",
-        "Generate & Send Emails": "Générer et envoyer des e-mails",
-        "🔄": "🔄",
-        "🔄 Refresh": "🔄 Actualiser",
-        # Email tracking explanation
-        "How email tracking works:": "Comment fonctionne le suivi des e-mails :",
-        "Delivered: Email successfully reached the recipient's inbox": "Délivré : L'e-mail a atteint avec succès la boîte de réception du destinataire",
-        "Read (Opened): Recipient opened the email and loaded images (tracking pixel)": "Lu (Ouvert) : Le destinataire a ouvert l'e-mail et chargé les images (pixel de suivi)",
-        "Clicked: Recipient clicked a link in the email": "Cliqué : Le destinataire a cliqué sur un lien dans l'e-mail",
-        "Why you might see \"Clicked\" without \"Read\":": "Pourquoi vous pourriez voir \"Cliqué\" sans \"Lu\" :",
-        "Recipient has images disabled/blocked in their email client": "Le destinataire a désactivé/bloqué les images dans son client de messagerie",
-        "Recipient clicked a link from email preview without fully opening": "Le destinataire a cliqué sur un lien depuis l'aperçu de l'e-mail sans l'ouvrir complètement",
-        "Some email clients block tracking pixels but allow link clicks": "Certains clients de messagerie bloquent les pixels de suivi mais autorisent les clics sur les liens",
-        "This is normal and indicates engagement even without open tracking!": "C'est normal et indique un engagement même sans suivi d'ouverture !",
-        # Email Status Explanations - Extended
-        "Email Delivery Statuses:": "Statuts de livraison des e-mails :",
-        "Permanent failure - email address doesn't exist, domain is invalid, or unreachable": "Échec permanent - l'adresse e-mail n'existe pas, le domaine est invalide ou inaccessible",
-        "Temporary issues (mailbox full, server busy), blocked by server, or other errors": "Problèmes temporaires (boîte aux lettres pleine, serveur occupé), bloqué par le serveur, ou autres erreurs",
-        "Deferred - email is still being retried by the server": "Différé - l'e-mail est toujours en cours de réessai par le serveur",
-        "Email successfully reached the recipient's inbox": "L'e-mail a atteint avec succès la boîte de réception du destinataire",
-        "Recipient opened the email and loaded images (tracking pixel)": "Le destinataire a ouvert l'e-mail et chargé les images (pixel de suivi)",
-        "Recipient clicked a link in the email": "Le destinataire a cliqué sur un lien dans l'e-mail",
-        "Recipient both opened and clicked links": "Le destinataire a ouvert et cliqué sur des liens",
-        "No delivery status received yet from Brevo": "Aucun statut de livraison reçu de Brevo pour le moment",
-        "Understanding Bounces:": "Comprendre les rebonds :",
-        "Hard Bounce → Invalid": "Rebond dur → Invalide",
-        "The email address is permanently invalid. Brevo marks these automatically.": "L'adresse e-mail est définitivement invalide. Brevo les marque automatiquement.",
-        "Soft Bounce → Invalid (Smart Detection)": "Rebond temporaire → Invalide (Détection intelligente)",
-        "Reasons like 'connection timeout', 'domain not found', 'no mail server' indicate the email is actually invalid.": "Des raisons comme 'délai de connexion dépassé', 'domaine introuvable', 'aucun serveur de messagerie' indiquent que l'e-mail est en réalité invalide.",
-        "Soft Bounce → Failed": "Rebond temporaire → Échec",
-        "Temporary issues - mailbox full, server temporarily down, message too large, etc. May succeed if retried later.": "Problèmes temporaires - boîte aux lettres pleine, serveur temporairement hors service, message trop volumineux, etc. Peut réussir si réessayé plus tard.",
-        "Blocked → Failed": "Bloqué → Échec",
-        "Recipient's server blocked the email due to spam filters or policy rules.": "Le serveur du destinataire a bloqué l'e-mail en raison de filtres anti-spam ou de règles de politique.",
-        "Smart Invalid Detection:": "Détection intelligente des invalides :",
-        "The system automatically identifies invalid emails by checking:": "Le système identifie automatiquement les e-mails invalides en vérifiant :",
-        "Hard bounces from Brevo (always invalid)": "Rebonds durs de Brevo (toujours invalides)",
-        "Soft bounces with reasons indicating permanent failures:": "Rebonds temporaires avec des raisons indiquant des échecs permanents :",
-        "Connection timeout (domain unreachable)": "Délai de connexion dépassé (domaine inaccessible)",
-        "Domain not found": "Domaine introuvable",
-        "No mail server for domain": "Aucun serveur de messagerie pour le domaine",
-        "Invalid/unknown recipient": "Destinataire invalide/inconnu",
-        "Enable debug mode below the table to see detailed bounce reasons from Brevo.": "Activez le mode débogage sous le tableau pour voir les raisons de rebond détaillées de Brevo.",
-        "Clicked Links Icons:": "Icônes des liens cliqués :",
-        "Unsubscribe link clicked": "Lien de désabonnement cliqué",
-        "Donation/payment link clicked": "Lien de don/paiement cliqué",
-        "Multiple icons show when recipient clicked multiple links (e.g., 🔕 💝 means both unsubscribe and donate were clicked)": "Plusieurs icônes s'affichent lorsque le destinataire a cliqué sur plusieurs liens (par ex., 🔕 💝 signifie que le désabonnement et le don ont été cliqués)",
-        "🚫 Invalid Email": "🚫 E-mail invalide",
-        "Invalid Email": "E-mail invalide",
-        "Bounce Reason": "Raison du rebond"
-    }
-}
+# Translation tables live in translations_<language_code>.json next to this module,
+# each a flat {key: translation_string} object, and are loaded on first use.
+_TRANSLATIONS_DIR = Path(__file__).resolve().parent
 
 # Default language if no session state is set
 DEFAULT_LANG = "en"
 
-# Global variable to store the selected language
-_selected_lang = DEFAULT_LANG
+@lru_cache(maxsize=len(LANGUAGES))
+def _load(lang):
+    """Returns the {key: translation_string} table for lang, parsed from its JSON file once per process."""
+    with open(_TRANSLATIONS_DIR / f"translations_{lang}.json", encoding="utf-8") as f:
+        return json.load(f)
 
-def set_language(lang_code):
-    """Sets the global language for translations."""
-    global _selected_lang
-    if lang_code in LANGUAGES:
-        _selected_lang = lang_code
-    else:
-        _selected_lang = DEFAULT_LANG # Fallback to default if invalid code
+# Selected language, local to the current thread/async context so concurrent
+# Streamlit sessions (each running in its own script thread) don't overwrite each other.
+# Only set by set_language(); see _current_lang() for runs that never call it.
+_selected_lang: ContextVar = ContextVar("lang", default=None)
 
-def _t(key, **kwargs):
+def _current_lang():
     """
-    Translates a given key into the selected language and formats it with kwargs.
-    If the key is not found, it returns the key itself as a fallback.
+    Returns the language for this context: the one given to set_language(), else the session's
+    st.session_state["language"], else DEFAULT_LANG.
+
+    Streamlit runs every rerun on a new script thread, and fragment reruns and widget callbacks
+    don't execute the set_language() call at the top of the app, so the ContextVar alone would
+    fall back to DEFAULT_LANG there.
     """
-    translation = TRANSLATIONS.get(_selected_lang, {}).get(key, key)
+    lang = _selected_lang.get()
+    if lang is not None:
+        return lang
+    st = sys.modules.get("streamlit")  # Only when running under Streamlit; never imported from here
+    if st is not None:
+        try:
+            lang = st.session_state.get("language")
+        except Exception:
+            lang = None  # No script run context (e.g. a worker thread)
+    return lang if lang in LANGUAGES else DEFAULT_LANG
+
+def set_language(lang_code):
+    """Sets the language for translations in the current context."""
+    lang = lang_code if lang_code in LANGUAGES else DEFAULT_LANG # Fallback to default if invalid code
+    _load(lang)  # Preload, so the first _t() call of the run doesn't read from disk
+    _selected_lang.set(lang)
+
+def _translate(lang, key, kwargs):
+    """Looks up key in lang (then DEFAULT_LANG, then the key itself) and formats it with kwargs (uncached)."""
+    translation = _load(lang).get(key)
+    if translation is None and lang != DEFAULT_LANG:
+        lang = DEFAULT_LANG
+        translation = _load(lang).get(key)
+    if translation is None:
+        translation = key
+    if "{" not in translation:
+        return translation  # No placeholders, nothing to format
+    if not kwargs:
+        return translation  # Nothing to substitute
     try:
         # Attempt to format the string with provided keyword arguments
         return translation.format(**kwargs)
     except KeyError as e:
         # Log or handle cases where a placeholder is missing in the translation string
         # For now, we'll just return the unformatted translation with a warning.
-        print(f"Translation Error: Missing placeholder {e} for key '{key}' in language '{_selected_lang}'. Original translation: '{translation}'")
+        print(f"Translation Error: Missing placeholder {e} for key '{key}' in language '{lang}'. Original translation: '{translation}'")
         return translation # Return unformatted string if formatting fails
     except IndexError as e:
-        print(f"Translation Error: Index error {e} for key '{key}' in language '{_selected_lang}'. Original translation: '{translation}'")
+        print(f"Translation Error: Index error {e} for key '{key}' in language '{lang}'. Original translation: '{translation}'")
         return translation # Return unformatted string if formatting fails
+
+@lru_cache(maxsize=2048)
+def _t_cached(lang, key, kwargs_items):
+    """Cached translation (keyed by language, so no invalidation is needed); kwargs_items is a sorted tuple of (name, value) pairs."""
+    return _translate(lang, key, dict(kwargs_items))
+
+def _t(key, **kwargs):
+    """
+    Translates a given key into the selected language and formats it with kwargs.
+    If the key is not found, it returns the key itself as a fallback.
+    Results are memoized, since Streamlit re-renders the same strings on every rerun.
+    """
+    lang = _current_lang()
+    if not kwargs:
+        # Plain lookups are already a single probe; no need for the cache key machinery
+        return _translate(lang, key, kwargs)
+    try:
+        return _t_cached(lang, key, tuple(sorted(kwargs.items())))
+    except TypeError:
+        # Unhashable kwarg values can't be cached
+        return _translate(lang, key, kwargs)
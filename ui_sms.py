@@ -7,6 +7,18 @@
 #   * Adds/uses session_state keys: sms_text, sms_send_result, sms_message_details, contacts (reused if present).
 #   * All user-facing strings routed through translations._t().
 #   * Designed to be called exclusively when AI_MESSENGER_MODE == "sms" from streamlit_app.py.
+# - v0.2 (2026-10-16): Upload/rerun performance.
+#   * Uploads are parsed in memory via st.cache_data keyed by file content (no temp file, no
+#     uploaded_file_name/uploaded_file_path tracking); adds session_state key sms_upload_id
+#     (content digest of the current upload, also keying the cached recipients table).
+#   * Compose box runs as an st.fragment; adds session_state key sms_has_text.
+#   * Results render as one table, with Refresh All / Refresh selected (sms_refresh_selection)
+#     instead of an expander and refresh button per message.
+#   * pandas and data_handler_phone_numbers are imported on first use, not at module import.
+#   * sms_message_details is a dict keyed by message_id, one entry per gateway message (recipients
+#     sharing a text share one message); refreshes update entries in place.
+#   * Each entry keeps recipient_states (per-phone state/error from the gateway, aligned with
+#     recipients); the results table has one row per recipient showing that recipient's own status.
 #
 # TODOs (follow-ups suggested):
 #   * Move/centralize phone normalization into data_handler.py to avoid duplication.
@@ -14,13 +26,16 @@
 #   * Extend translations.py with the new keys (EN + HE if present) used below.
 #   * Wire proper country-aware E.164 normalization (DEFAULT_SMS_COUNTRY) if needed.
 
-from typing import List, Dict, Optional
+import hashlib
+import io
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, List, Dict, Optional, Tuple
 
-import pandas as pd
 import streamlit as st
-import tempfile
-import shutil
-import os # Import os for path existence check
+
+if TYPE_CHECKING:
+    import pandas as pd
+
 try:
     # Project-local translation function
     from translations import _t
@@ -33,6 +48,7 @@ except Exception:
 # Expected interface:
 #   send_bulk_sms(versions: List[Dict[str, str]]) -> List[Dict[str, str]]
 #   get_sms_event(message_id: str) -> Dict[str, str]
+#   get_sms_events(message_ids: List[str]) -> Dict[str, Dict[str, str]]  (optional, bulk refresh)
 try:
     from sms_tool import send_bulk_sms, get_sms_event
 except Exception:
@@ -46,14 +62,88 @@ except Exception:
     def get_sms_event(message_id: str) -> Dict[str, str]:  # type: ignore
         return {"message_id": message_id, "state": "queued", "updated_at": None}
 
-# Import the new data handler for phone numbers
-from data_handler_phone_numbers import load_contacts_from_excel
+try:
+    from sms_tool import get_sms_events
+except Exception:
+    # Without a bulk lookup, fan get_sms_event out over a thread pool (the calls are network-bound)
+    def get_sms_events(message_ids: List[str]) -> Dict[str, Dict[str, str]]:  # type: ignore
+        def _lookup(message_id: str) -> Dict[str, str]:
+            try:
+                return get_sms_event(message_id)
+            except Exception as e:
+                return {"message_id": message_id, "state": "unknown", "updated_at": None, "error": str(e)}
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            return dict(zip(message_ids, executor.map(_lookup, message_ids)))
 
 
 # ---------------------------
 # Helpers (kept minimal)
 # ---------------------------
 
+@st.cache_data(show_spinner=False, max_entries=8)
+def _parse_contacts(file_bytes: bytes) -> Tuple[List[Dict[str, str]], List[str]]:
+    """Parses an uploaded workbook into (contacts, issues).
+
+    Cached by file content, so reruns (and re-uploading the same file) skip the Excel parse.
+    """
+    # Imported on first upload: the phone-number data handler pulls in pandas (and its Excel readers)
+    from data_handler_phone_numbers import load_contacts_from_excel
+
+    return load_contacts_from_excel(io.BytesIO(file_bytes))
+
+
+def _build_recipients_frame(contacts: List[Dict[str, str]]) -> "pd.DataFrame":
+    """Recipients table for the UI: the data handler's contacts, with phone_number renamed to phone."""
+    import pandas as pd
+
+    recipients_df = pd.DataFrame.from_records(contacts, columns=["name", "phone_number"])
+    recipients_df.columns = ["name", "phone"] # Rename for UI consistency, without rebuilding the frame
+    return recipients_df
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _recipients_frame(contacts_key: str, _contacts: List[Dict[str, str]]) -> "pd.DataFrame":
+    """_build_recipients_frame(), cached per contacts_key (digest of the upload the contacts came from).
+
+    _contacts is underscore-prefixed so Streamlit doesn't hash the whole list on every rerun.
+    """
+    return _build_recipients_frame(_contacts)
+
+
+# st.fragment (Streamlit >= 1.37; st.experimental_fragment before that) reruns only the decorated
+# function when its widgets change; on older versions the section simply runs with the full script
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda func: func)
+
+
+@_fragment
+def _compose_fragment() -> None:
+    """Compose box and character count.
+
+    Runs as a fragment, so editing the text reruns only this section, not the upload/recipients part.
+    """
+    # Bound by key only: Streamlit owns st.session_state.sms_text (initialized in render()),
+    # so no value= is passed and nothing is written back
+    st.text_area(
+        label=_t("SMS Text"),
+        height=140,
+        placeholder=_t("Write the SMS text here..."),
+        key="sms_text",
+    )
+
+    # Minimal character count hint (no GSM-7/UCS-2 segmentation yet)
+    # Access sms_text directly from session_state for dynamic updates
+    st.caption(_t("Characters: {n}", n=len(st.session_state.sms_text or "")))
+
+    # The Send button lives outside this fragment and is only enabled with some text:
+    # rerun the whole app when the text goes from empty to non-empty (or back)
+    has_text = bool((st.session_state.sms_text or "").strip())
+    if st.session_state.get("sms_has_text", has_text) != has_text:
+        st.session_state["sms_has_text"] = has_text
+        st.rerun()
+    st.session_state["sms_has_text"] = has_text
+
+
 def _status_badge(state: Optional[str]) -> str:
     state = (state or "").lower()
     mapping = {
@@ -65,6 +155,27 @@ def _status_badge(state: Optional[str]) -> str:
     return mapping.get(state, _t("Unknown"))
 
 
+def _phone_digits(phone: Optional[str]) -> str:
+    return "".join(ch for ch in str(phone or "") if ch.isdigit())
+
+
+def _match_recipient_states(recipients: List[str], event: Dict) -> List[Optional[Dict[str, Optional[str]]]]:
+    """
+    Pairs each recipient of a message with its own state from the get_sms_event() dict.
+    Phones are matched on their digits (the gateway may reformat them); when the counts agree,
+    unmatched phones fall back to the gateway's order, which is the send order. Unmatched -> None.
+    """
+    reported = event.get("recipients") or []
+    by_digits = {_phone_digits(r.get("phone_number")): r for r in reported}
+    by_digits.pop("", None)
+    same_order = len(reported) == len(recipients)
+    matched = []
+    for i, phone in enumerate(recipients):
+        own = by_digits.get(_phone_digits(phone)) or (reported[i] if same_order else None)
+        matched.append({"state": own.get("state"), "error": own.get("error")} if own else None)
+    return matched
+
+
 # ---------------------------
 # Main render function (called by streamlit_app when mode==sms)
 # ---------------------------
@@ -81,72 +192,57 @@ def render() -> None:
     # Initialize session state keys we use
     st.session_state.setdefault("sms_text", "")
     st.session_state.setdefault("sms_send_result", None)
-    st.session_state.setdefault("sms_message_details", [])  # list of dicts
+    st.session_state.setdefault("sms_message_details", {})  # {message_id: dict}
     st.session_state.setdefault("contacts", []) # List of dicts from data_handler_phone_numbers
     st.session_state.setdefault("contact_issues", []) # List of strings from data_handler_phone_numbers
-    st.session_state.setdefault("uploaded_file_name", None) # To track if the file has changed by name
-    st.session_state.setdefault("uploaded_file_path", None) # To store path for access
 
     st.markdown("---")
     st.header(_t("Upload Contacts"))
 
     uploaded_file = st.file_uploader(_t("Upload an Excel file with contacts"), type=["xlsx", "xls"])
 
-    # Process file only if a new file is uploaded (by name or initial upload)
-    if uploaded_file is not None and \
-       (st.session_state.uploaded_file_name is None or \
-        st.session_state.uploaded_file_name != uploaded_file.name):
-        
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx") as tmp_file:
-            shutil.copyfileobj(uploaded_file, tmp_file)
-            st.session_state.uploaded_file_path = tmp_file.name # Store path for access
-        
-        st.session_state.uploaded_file_name = uploaded_file.name
-        
-        # Use the new data handler
-        contacts, issues = load_contacts_from_excel(st.session_state.uploaded_file_path)
+    if uploaded_file is not None:
+        # Parsed on every rerun, but served from the cache unless the file content changed
+        file_bytes = uploaded_file.getvalue()
+        contacts, issues = _parse_contacts(file_bytes)
         st.session_state.contacts = contacts
         st.session_state.contact_issues = issues
-        
-        if issues:
-            st.warning(_t("WARNING: Some contacts had issues (e.g., missing/invalid phone numbers). They will be skipped."))
-            for issue in issues:
-                st.info(f"  - {issue}")
-        
-        if contacts:
-            st.success(_t("Successfully loaded {count} valid contacts.", count=len(contacts)))
-        else:
-            st.error(_t("No valid contacts found in the Excel file."))
-
-    # Consider existing contacts in session_state (if user navigated back)
-    if not st.session_state.contacts and st.session_state.uploaded_file_name:
-        # If contacts were cleared but file name exists, try reloading
-        if st.session_state.uploaded_file_path and os.path.exists(st.session_state.uploaded_file_path):
-            contacts, issues = load_contacts_from_excel(st.session_state.uploaded_file_path)
-            st.session_state.contacts = contacts
-            st.session_state.contact_issues = issues
-            if contacts:
-                st.success(_t("Re-loaded {count} valid contacts from previous upload.", count=len(contacts)))
+
+        # Report load results once per upload rather than on every rerun.
+        # Content digest, so it can also key the (cross-session) recipients table cache.
+        upload_id = hashlib.sha256(file_bytes).hexdigest()
+        if st.session_state.get("sms_upload_id") != upload_id:
+            st.session_state["sms_upload_id"] = upload_id
+
             if issues:
                 st.warning(_t("WARNING: Some contacts had issues (e.g., missing/invalid phone numbers). They will be skipped."))
                 for issue in issues:
                     st.info(f"  - {issue}")
-        else:
-            st.info(_t("Please upload an Excel file to get started."))
-    elif not st.session_state.uploaded_file_name:
+
+            if contacts:
+                st.success(_t("Successfully loaded {count} valid contacts.", count=len(contacts)))
+            else:
+                st.error(_t("No valid contacts found in the Excel file."))
+    elif not st.session_state.contacts:
+        # Contacts from a previous upload stay in session_state (e.g. if the user navigated back)
         st.info(_t("Please upload an Excel file to get started."))
 
 
     # Derive recipients table from st.session_state.contacts
     # The data handler already returns contacts in the desired format: [{"name": "...", "phone_number": "..."}]
-    recipients_df = pd.DataFrame(st.session_state.contacts)
-    if not recipients_df.empty:
-        recipients_df = recipients_df.rename(columns={"phone_number": "phone"}) # Rename for UI consistency
+    # Built once per upload rather than on every rerun (text edits, button clicks, ...),
+    # and not at all (so pandas isn't imported) until there are contacts
+    if not st.session_state.contacts:
+        recipients_df = None
+    elif st.session_state.get("sms_upload_id"):
+        recipients_df = _recipients_frame(st.session_state["sms_upload_id"], st.session_state.contacts)
+    else:
+        recipients_df = _build_recipients_frame(st.session_state.contacts)
 
-    if recipients_df.empty:
+    if recipients_df is None or recipients_df.empty:
         # Only show this warning if a file has been uploaded and processed, but no valid recipients were found.
         # Otherwise, the "Please upload an Excel file to get started." message should take precedence.
-        if st.session_state.uploaded_file_name: # This means a file was uploaded and processed
+        if uploaded_file is not None: # This means a file was uploaded and processed
             st.warning(_t("No recipients with a phone number found"))
         # We still render the compose box to let the user pre-write the SMS
     else:
@@ -157,44 +253,36 @@ def render() -> None:
     st.markdown("---")
     st.header(_t("Compose"))
 
-    st.text_area(
-        label=_t("SMS Text"),
-        value=st.session_state.get("sms_text", ""),
-        height=140,
-        placeholder=_t("Write the SMS text here..."),
-        key="sms_text", # Bind directly to session_state
-    )
-
-    # Minimal character count hint (no GSM-7/UCS-2 segmentation yet)
-    # Access sms_text directly from session_state for dynamic updates
-    st.caption(_t("Characters: {n}", n=len(st.session_state.sms_text or "")))
+    _compose_fragment()
 
     st.markdown("---")
 
     # Send button row
     col_send, col_summary = st.columns([1, 2])
     with col_send:
-        disabled = recipients_df.empty or not (st.session_state.sms_text and st.session_state.sms_text.strip())
+        disabled = recipients_df is None or recipients_df.empty or not (st.session_state.sms_text and st.session_state.sms_text.strip())
         if st.button(_t("Send SMS"), type="primary", disabled=disabled):
-            versions = [
-                {"recipient": row["phone"], "text": st.session_state.sms_text}
-                for _, row in recipients_df.iterrows()
-            ]
-
             # Safety cap: align with email batch cap (2000). sms_tool may enforce too.
-            if len(versions) > 2000:
+            # Checked before building the versions, so oversized uploads fail fast.
+            if len(recipients_df) > 2000:
                 st.error(_t("Too many recipients. Please send in batches of up to 2000."))
             else:
+                sms_text = st.session_state.sms_text
+                versions = [
+                    {"recipient": phone, "text": sms_text}
+                    for phone in recipients_df["phone"].to_numpy()
+                ]
                 try:
                     results = send_bulk_sms(versions)
                 except Exception as e:  # Surface library/network errors without crashing the UI
                     st.error(_t("Failed to send SMS. Please check credentials/network and try again."))
                 else:
-                    # Persist details for the Results section
-                    details = []
+                    # Persist details for the Results section, one entry per gateway message
+                    # (recipients sharing a text are sent as one message and share its ID)
+                    details = {}
                     accepted = 0
                     failed = 0
-                    for item in results:
+                    for i, item in enumerate(results):
                         recipient = item.get("recipient")
                         message_id = item.get("message_id")
                         error = item.get("error")
@@ -202,13 +290,19 @@ def render() -> None:
                             accepted += 1
                         else:
                             failed += 1
-                        details.append({
-                            "recipient": recipient,
-                            "message_id": message_id,
-                            "error": error,
-                            "last_status": None,
-                            "last_checked_at": None,
-                        })
+                        # Recipients that never got a message ID each keep their own entry
+                        key = message_id or f"unsent-{i}"
+                        if key in details:
+                            details[key]["recipients"].append(recipient)
+                        else:
+                            details[key] = {
+                                "recipients": [recipient],
+                                "message_id": message_id,
+                                "error": error,
+                                "last_status": None,
+                                "last_checked_at": None,
+                                "recipient_states": None,
+                            }
 
                     st.session_state["sms_message_details"] = details
                     st.session_state["sms_send_result"] = {
@@ -232,38 +326,66 @@ def render() -> None:
             st.metric(label=_t("Failed"), value=res.get("failed", 0))
 
     # Results & Events section
-    details = st.session_state.get("sms_message_details") or []
+    details = st.session_state.get("sms_message_details") or {}
     if details:
         st.markdown("---")
         st.subheader(_t("Individual SMS Status & Events"))
 
-        for i, msg in enumerate(details):
-            recipient = msg.get("recipient") or ""
-            message_id = msg.get("message_id") or ""
-            header = f"{_t('Recipient')}: {recipient} | {_t('Message ID')}: {message_id}"
-
-            with st.expander(header, expanded=False):
-                st.markdown(f"**{_t('Recipient')}:** `{recipient}`")
-                st.markdown(f"**{_t('Message ID')}:** `{message_id}`")
-
-                cols = st.columns([1, 1, 2])
-                with cols[0]:
-                    if st.button(_t("Refresh SMS Events"), key=f"refresh_sms_{message_id}_{i}"):
-                        try:
-                            event = get_sms_event(message_id)
-                            msg["last_status"] = event.get("state")
-                            msg["last_checked_at"] = event.get("updated_at")
-                            st.session_state["sms_message_details"][i] = msg
-                        except Exception:
-                            st.error(_t("Failed to fetch SMS events for this message."))
-                with cols[1]:
-                    st.write(_t("Delivery status"))
-                    st.info(_status_badge(msg.get("last_status")))
-                with cols[2]:
-                    if msg.get("error"):
-                        st.error(str(msg.get("error")))
-                    else:
-                        st.caption(_t("Last checked: {ts}", ts=msg.get("last_checked_at") or _t("n/a")))
+        # Status lookups for several messages run concurrently (get_sms_events), not one click per message
+        message_ids = [msg["message_id"] for msg in details.values() if msg.get("message_id")]
+        selected_ids = st.multiselect(
+            _t("Messages to refresh"),
+            options=message_ids,
+            format_func=lambda mid: f"{mid} ({', '.join(r for r in details[mid]['recipients'] if r)})",
+            key="sms_refresh_selection",
+        )
+        col_all, col_selected = st.columns([1, 1])
+        with col_all:
+            refresh_ids = message_ids if st.button(_t("Refresh All"), key="refresh_sms_all", disabled=not message_ids) else []
+        with col_selected:
+            if st.button(_t("Refresh selected"), key="refresh_sms_selected", disabled=not selected_ids):
+                refresh_ids = selected_ids
+
+        if refresh_ids:
+            with st.spinner(_t("Refreshing SMS events...")):
+                events = get_sms_events(refresh_ids)
+            refresh_failed = 0
+            for message_id, event in events.items():
+                if event.get("error"):
+                    refresh_failed += 1  # Keep the last known status
+                    continue
+                # details holds the dicts stored in session_state, so this updates them in place
+                msg = details[message_id]
+                msg.update(
+                    last_status=event.get("state"),
+                    last_checked_at=event.get("updated_at"),
+                    recipient_states=_match_recipient_states(msg["recipients"], event),
+                )
+            if refresh_failed:
+                st.error(_t("Failed to fetch SMS events for {n} messages.", n=refresh_failed))
+
+        # One table for all messages instead of an expander + columns per message. Each recipient gets
+        # its own row and status: one message-level "delivered" can hide failed phones in the group.
+        import pandas as pd
+
+        rows = []
+        for msg in details.values():
+            recipients = msg.get("recipients") or []
+            own_states = msg.get("recipient_states") or [None] * len(recipients)
+            for recipient, own in zip(recipients, own_states):
+                error = (own or {}).get("error") or msg.get("error")
+                rows.append((
+                    recipient or "",
+                    msg.get("message_id") or "",
+                    _status_badge(own["state"] if own else msg.get("last_status")),
+                    msg.get("last_checked_at") or _t("n/a"),
+                    str(error) if error else "",
+                ))
+        details_df = pd.DataFrame.from_records(
+            rows,
+            columns=[_t("Recipient"), _t("Message ID"), _t("Delivery status"), _t("Last checked"), _t("Error")],
+        )
+        st.dataframe(details_df, use_container_width=True, hide_index=True)
 
 
 # If this file is executed directly (rare in Streamlit), render for convenience.